@@ -1,40 +1,31 @@
 #!/usr/bin/env python3
 """
-Decorator to log SQL queries before execution.
+Decorator to log SQL queries.
 """
 
 import sqlite3
-import functools
-from datetime import datetime
 
+import query_log
 
-def log_queries(func):
+
+def log_queries(func=None, *, sample_rate=1.0, redact=True):
     """
-    Decorator that logs SQL queries before executing them.
+    Decorator that logs SQL queries as structured records.
+    
+    Built on query_log.instrument_queries: each sampled call is logged
+    with its query fingerprint, timing, row count, caller and error, and
+    records are written by a background thread so logging never blocks
+    the query. Can be used bare (@log_queries) or with options.
     
     Args:
         func: The function to be decorated
+        sample_rate (float): Fraction of calls to record (0.0 to 1.0)
+        redact (bool): Log parameter types instead of values
     
     Returns:
         wrapper: The wrapped function that logs queries
     """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Extract query from kwargs or args
-        query = kwargs.get('query', None)
-        if query is None and args:
-            # If query is passed as positional argument, check first arg
-            query = args[0] if args else None
-        
-        # Log the query if it exists
-        if query:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{timestamp}] Executing query: {query}")
-        
-        # Execute the original function
-        return func(*args, **kwargs)
-    
-    return wrapper
+    return query_log.instrument_queries(func, sample_rate=sample_rate, redact=redact)
 
 
 @log_queries
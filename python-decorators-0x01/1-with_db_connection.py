@@ -3,14 +3,15 @@
 Decorator to automatically handle database connections.
 """
 
-import sqlite3
 import functools
 
+import db_pool
+
 
 def with_db_connection(func):
     """
-    Decorator that automatically opens a database connection, passes it to the function,
-    and closes it afterward.
+    Decorator that borrows a connection from the shared users.db pool, passes it
+    to the function, and returns it to the pool afterward.
     
     Args:
         func: The function to be decorated
@@ -20,23 +21,17 @@ def with_db_connection(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Open database connection
-        conn = sqlite3.connect('users.db')
-        try:
+        # Borrow a connection; it goes back to the pool even if an error occurs
+        with db_pool.get_pool('users.db').connection() as conn:
             # Pass connection as first argument to the function
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            # Always close the connection, even if an error occurs
-            conn.close()
+            return func(conn, *args, **kwargs)
     
     return wrapper
 
 
 @with_db_connection
 def get_user_by_id(conn, user_id):
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    cursor = conn.execute_cached("SELECT * FROM users WHERE id = ?", (user_id,))
     return cursor.fetchone()
 
 
@@ -3,14 +3,84 @@
 Decorator to manage database transactions.
 """
 
-import sqlite3
 import functools
+import threading
+from contextlib import contextmanager
+
+import db_pool
+import group_commit
+import result_cache
+
+
+# Open transactional scopes per connection (keyed by id) and the
+# connections borrowed by with_db_connection on this thread
+_local = threading.local()
+
+
+def _depth(conn):
+    """
+    Returns how many transactional scopes are open on conn in this thread.
+    """
+    return getattr(_local, 'depths', {}).get(id(conn), 0)
+
+
+@contextmanager
+def _open_scope(conn):
+    """
+    Marks one more transactional scope as open on conn while in the block.
+    """
+    if not hasattr(_local, 'depths'):
+        _local.depths = {}
+    key = id(conn)
+    _local.depths[key] = _local.depths.get(key, 0) + 1
+    try:
+        yield
+    finally:
+        _local.depths[key] -= 1
+        if not _local.depths[key]:
+            del _local.depths[key]
+
+
+def _open_connection(pool):
+    """
+    Returns this thread's innermost connection borrowed from pool that has
+    an open transactional scope, or None.
+    """
+    for owner, conn in reversed(getattr(_local, 'borrowed', [])):
+        if owner is pool and _depth(conn):
+            return conn
+    return None
+
+
+def _run_nested(func, conn, args, kwargs):
+    """
+    Runs a transactional function inside an enclosing transaction as a
+    savepoint: its changes are undone on error, and kept until the
+    outermost scope commits otherwise.
+    """
+    name = f"transactional_{_depth(conn)}"
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        with _open_scope(conn):
+            result = func(conn, *args, **kwargs)
+    except Exception:
+        # SQLite may already have rolled the whole transaction back
+        if conn.in_transaction:
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
+    return result
 
 
 def with_db_connection(func):
     """
-    Decorator that automatically opens a database connection, passes it to the function,
-    and closes it afterward.
+    Decorator that borrows a connection from the shared users.db pool, passes it
+    to the function, and returns it to the pool afterward.
+    Inside a group_commit.GroupCommit scope on users.db, the scope's
+    connection is passed instead, and inside a transactional function on
+    this thread the connection of its transaction is reused, so nested
+    transactional calls become savepoints instead of waiting on its lock.
     
     Args:
         func: The function to be decorated
@@ -20,15 +90,25 @@ def with_db_connection(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Open database connection
-        conn = sqlite3.connect('users.db')
-        try:
-            # Pass connection as first argument to the function
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            # Always close the connection, even if an error occurs
-            conn.close()
+        # Join the open group commit so the call is batched with the others
+        pool = db_pool.get_pool('users.db')
+        scope = group_commit.current_scope()
+        if scope is not None and scope.pool is pool:
+            return func(scope.conn, *args, **kwargs)
+        # Join the enclosing transaction on this thread, if any
+        conn = _open_connection(pool)
+        if conn is not None:
+            return func(conn, *args, **kwargs)
+        # Borrow a connection; it goes back to the pool even if an error occurs
+        with pool.connection() as conn:
+            if not hasattr(_local, 'borrowed'):
+                _local.borrowed = []
+            _local.borrowed.append((pool, conn))
+            try:
+                # Pass connection as first argument to the function
+                return func(conn, *args, **kwargs)
+            finally:
+                _local.borrowed.pop()
     
     return wrapper
 
@@ -37,6 +117,13 @@ def transactional(func):
     """
     Decorator that manages database transactions by automatically committing or rolling back changes.
     If the function raises an error, rollback; otherwise commit the transaction.
+    After a successful commit, cached query results that read the tables
+    written by the transaction are invalidated.
+    Calls nested inside another transactional function on the same
+    connection run as savepoints: an inner error rolls back only the inner
+    changes (and propagates), and only the outermost call commits.
+    On the connection of a group_commit.GroupCommit scope the call joins the
+    scope's group instead and returns a Future that resolves at its commit.
     
     Args:
         func: The function to be decorated
@@ -46,17 +133,50 @@ def transactional(func):
     """
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
+        if _depth(conn):
+            return _run_nested(func, conn, args, kwargs)
+        
+        scope = group_commit.current_scope()
+        if scope is not None and scope.conn is conn:
+            # The group wraps the call in its own savepoint
+            def run_in_group(conn, *args, **kwargs):
+                with _open_scope(conn):
+                    return func(conn, *args, **kwargs)
+            
+            return scope.submit(run_in_group, *args, **kwargs)
+        
+        # Record the tables written by every statement the function runs
+        written = set()
+        
+        def track(statement):
+            table = result_cache.written_table(statement)
+            if table:
+                written.add(table)
+        
+        conn.set_trace_callback(track)
         try:
+            # Begin explicitly so nested savepoints never start (and, when
+            # released, commit) a transaction of their own
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
             # Execute the function
-            result = func(conn, *args, **kwargs)
+            with _open_scope(conn):
+                result = func(conn, *args, **kwargs)
             # If successful, commit the transaction
             conn.commit()
-            return result
         except Exception as e:
             # If an error occurs, rollback the transaction
             conn.rollback()
             # Re-raise the exception
             raise
+        finally:
+            conn.set_trace_callback(None)
+        
+        if written:
+            result_cache.default_cache.invalidate_tables(
+                db_pool.database_path(conn), written
+            )
+        return result
     
     return wrapper
 
@@ -4,14 +4,19 @@ Decorator to retry database operations on failure.
 """
 
 import time
+import asyncio
+import inspect
 import sqlite3
 import functools
 
+import db_pool
+import retry_policy
+
 
 def with_db_connection(func):
     """
-    Decorator that automatically opens a database connection, passes it to the function,
-    and closes it afterward.
+    Decorator that borrows a connection from the shared users.db pool, passes it
+    to the function, and returns it to the pool afterward.
     
     Args:
         func: The function to be decorated
@@ -21,48 +26,132 @@ def with_db_connection(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Open database connection
-        conn = sqlite3.connect('users.db')
-        try:
+        # Borrow a connection; it goes back to the pool even if an error occurs
+        with db_pool.get_pool('users.db').connection() as conn:
             # Pass connection as first argument to the function
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            # Always close the connection, even if an error occurs
-            conn.close()
+            return func(conn, *args, **kwargs)
     
     return wrapper
 
 
-def retry_on_failure(retries=3, delay=2):
+def _reset_connection(conn):
+    """
+    Rolls back a failed attempt's transaction and checks the connection.
+    
+    Returns:
+        bool: True if the connection can run another attempt
+    """
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("SELECT 1").fetchone()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def retry_on_failure(retries=3, delay=2, max_delay=30, deadline=None, policy=None,
+                     database=None):
     """
     Decorator factory that creates a decorator to retry database operations if they fail.
     
+    Only transient errors (e.g. "database is locked") are retried, after an
+    exponential backoff with full jitter, until retries attempts are used or
+    the deadline passes. All retried calls against one database share a
+    retry budget and a circuit breaker, so contention does not turn into a
+    retry storm; the breaker counts a call as failed only once its retries
+    are used up. When the first argument is a connection, it is rolled back
+    before each retry; if it is broken and was borrowed from the pool, it
+    is invalidated and replaced by a new pooled connection, so a retry never
+    holds two pool slots. Works on both regular and async functions.
+    
     Args:
-        retries (int): Number of times to retry the function (default: 3)
-        delay (int): Delay in seconds between retries (default: 2)
+        retries (int): Total number of attempts (default: 3)
+        delay (float): Backoff scale in seconds; retry n waits up to
+            delay * 2**n seconds (default: 2)
+        max_delay (float): Cap on a single backoff in seconds (default: 30)
+        deadline (float, optional): Seconds after which no new attempt starts
+        policy (RetryPolicy, optional): Replaces the four settings above
+        database (str, optional): Key of the shared budget/breaker;
+            defaults to the connection's database path
     
     Returns:
         decorator: A decorator that retries the function on failure
     """
+    policy = policy or retry_policy.RetryPolicy(
+        retries=retries, base_delay=delay, max_delay=max_delay, deadline=deadline
+    )
+    
     def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            last_exception = None
-            
-            # Try to execute the function up to 'retries' times
-            for attempt in range(retries):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                budget, breaker = retry_policy.get_guard(database or func.__qualname__)
+                budget.record_call()
+                trial = breaker.before_call()
+                started = time.monotonic()
+                attempt = 0
                 try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    # If this is not the last attempt, wait before retrying
-                    if attempt < retries - 1:
-                        time.sleep(delay)
-                    # If this is the last attempt, the exception will be raised below
+                    while True:
+                        try:
+                            result = await func(*args, **kwargs)
+                        except Exception as e:
+                            wait = policy.next_delay(attempt, e, started, budget)
+                            if wait is None:
+                                if policy.classify(e):
+                                    breaker.record_failure()
+                                raise
+                        else:
+                            breaker.record_success()
+                            return result
+                        await asyncio.sleep(wait)
+                        attempt += 1
+                finally:
+                    breaker.end_call(trial)
             
-            # If all retries failed, raise the last exception
-            raise last_exception
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            conn = args[0] if args and isinstance(args[0], sqlite3.Connection) else None
+            path = db_pool.database_path(conn) if conn is not None else ''
+            pool = db_pool.get_pool(path) if path else None
+            budget, breaker = retry_policy.get_guard(database or path or func.__qualname__)
+            budget.record_call()
+            trial = breaker.before_call()
+            started = time.monotonic()
+            attempt = 0
+            call_args = args
+            # Replacement connection borrowed by this wrapper, if any
+            fresh = None
+            try:
+                while True:
+                    try:
+                        result = func(*call_args, **kwargs)
+                    except Exception as e:
+                        wait = policy.next_delay(attempt, e, started, budget)
+                        if wait is None:
+                            if policy.classify(e):
+                                breaker.record_failure()
+                            raise
+                    else:
+                        breaker.record_success()
+                        return result
+                    
+                    current = call_args[0] if conn is not None else None
+                    if (current is not None and not _reset_connection(current)
+                            and pool is not None and pool.owns(current)):
+                        # Reconnect: free the broken connection's slot first,
+                        # so the replacement never waits on this call's own slot
+                        pool.invalidate(current)
+                        fresh = pool.acquire()
+                        call_args = (fresh,) + args[1:]
+                    time.sleep(wait)
+                    attempt += 1
+            finally:
+                if fresh is not None:
+                    pool.release(fresh)
+                breaker.end_call(trial)
         
         return wrapper
     return decorator
@@ -4,17 +4,21 @@ Decorator to cache database query results.
 """
 
 import time
-import sqlite3
 import functools
 
+import db_pool
+import result_cache
 
-query_cache = {}
+
+query_cache = result_cache.default_cache
+in_flight = result_cache.SingleFlight()
+_MISSING = object()
 
 
 def with_db_connection(func):
     """
-    Decorator that automatically opens a database connection, passes it to the function,
-    and closes it afterward.
+    Decorator that borrows a connection from the shared users.db pool, passes it
+    to the function, and returns it to the pool afterward.
     
     Args:
         func: The function to be decorated
@@ -24,51 +28,86 @@ def with_db_connection(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Open database connection
-        conn = sqlite3.connect('users.db')
-        try:
+        # Borrow a connection; it goes back to the pool even if an error occurs
+        with db_pool.get_pool('users.db').connection() as conn:
             # Pass connection as first argument to the function
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            # Always close the connection, even if an error occurs
-            conn.close()
+            return func(conn, *args, **kwargs)
     
     return wrapper
 
 
-def cache_query(func):
+def cache_query(func=None, *, ttl=None, wait_timeout=30):
     """
-    Decorator that caches query results based on the SQL query string.
-    If the query has been executed before, returns the cached result instead of executing again.
+    Decorator that caches query results in query_cache.
+    
+    The cache key is the database path, the SQL query string and every
+    other argument the function is called with, so the same query with
+    different parameters or against a different database is cached
+    separately. Each entry records the tables the query reads, and is
+    dropped when the transactional decorator commits a write to one of them.
+    Concurrent misses for the same key run the query once and share its
+    result or its error (single-flight). Calls made inside an open
+    transaction bypass both the cache and single-flight. Can be used bare
+    (@cache_query) or with a per-function time to live (@cache_query(ttl=60)).
     
     Args:
         func: The function to be decorated
+        ttl (float, optional): Seconds results stay cached, overriding
+            the query_cache default
+        wait_timeout (float): Seconds a caller waits for an identical
+            in-flight query before raising TimeoutError (default: 30)
     
     Returns:
         wrapper: The wrapped function that caches query results
     """
-    @functools.wraps(func)
-    def wrapper(conn, *args, **kwargs):
-        # Extract query from kwargs or args
-        query = kwargs.get('query', None)
-        if query is None and args:
-            # If query is passed as positional argument, check first arg after conn
-            query = args[0] if args else None
-        
-        # Check if query result is in cache
-        if query in query_cache:
-            return query_cache[query]
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            if conn.in_transaction:
+                # The query may see uncommitted writes, which a rollback
+                # would leave in the cache; it must also see its own writes
+                return func(conn, *args, **kwargs)
+            
+            # Extract query from kwargs or args
+            query = kwargs.get('query', None)
+            params = args
+            if query is None and args:
+                # If query is passed as positional argument, check first arg after conn
+                query, params = args[0], args[1:]
+            other_kwargs = tuple(sorted(
+                (name, value) for name, value in kwargs.items() if name != 'query'
+            ))
+            database = db_pool.database_path(conn)
+            key = (database, query, params, other_kwargs)
+            try:
+                hash(key)
+            except TypeError:
+                # Unhashable parameters cannot be cached
+                return func(conn, *args, **kwargs)
+            
+            # Check if query result is in cache
+            result = query_cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+            
+            def load():
+                # Take the tables' version first, so a write committed while
+                # the query runs keeps its (possibly stale) result out
+                tables = result_cache.read_tables(query)
+                version = query_cache.version(database, tables)
+                # Execute the function and cache the result
+                result = func(conn, *args, **kwargs)
+                query_cache.set(key, result, ttl, database, tables, version)
+                return result
+            
+            # Identical concurrent misses wait for one execution
+            return in_flight.do(key, load, wait_timeout)
         
-        # Execute the function and get the result
-        result = func(conn, *args, **kwargs)
-        
-        # Cache the result
-        query_cache[query] = result
-        
-        return result
+        return wrapper
     
-    return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 
 @with_db_connection
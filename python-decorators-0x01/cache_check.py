@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for write-aware cache invalidation: the tables read and
+written by a statement, writes racing a cached read, and reads inside a
+transaction that is rolled back.
+
+Runs against a throwaway users.db in a temporary directory.
+
+Usage:
+    python3 cache_check.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+from concurrency_check import create_users_db
+
+
+READS = (
+    ("SELECT * FROM users u, orders o WHERE u.id = o.user_id", {'users', 'orders'}),
+    ("SELECT * FROM main.users", {'users'}),
+    ("SELECT * FROM users JOIN orders ON users.id = orders.user_id, items",
+     {'users', 'orders', 'items'}),
+    ("SELECT * FROM (SELECT * FROM users) u, orders", {'users', 'orders'}),
+    ("SELECT * FROM users WHERE id IN (SELECT user_id FROM orders)", {'users', 'orders'}),
+    ("SELECT 'from x' FROM users -- join y", {'users'}),
+    ("SELECT * FROM aux.users", {'*'}),
+    ("SELECT * FROM json_each(?)", {'*'}),
+)
+WRITES = (
+    ("INSERT OR REPLACE INTO main.users VALUES (1)", 'users'),
+    ("WITH old AS (SELECT id FROM users) UPDATE orders SET state = 0", 'orders'),
+    ("DELETE FROM aux.users", '*'),
+    ("UPDATE (SELECT 1) SET x = 1", '*'),
+    ("WITH recent AS (SELECT 1) SELECT * FROM recent", None),
+)
+
+
+def check_parsing(result_cache):
+    """
+    Every table is found, and uncertain statements depend on any table.
+    """
+    for sql, expected in READS:
+        found = result_cache.read_tables(sql)
+        assert found == expected, f"{sql!r} reads {sorted(found)}"
+    for sql, expected in WRITES:
+        found = result_cache.written_table(sql)
+        assert found == expected, f"{sql!r} writes {found!r}"
+    print(f"parsing: {len(READS)} reads and {len(WRITES)} writes resolved")
+
+
+def check_unknown_write(result_cache):
+    """
+    A write to an unknown table drops every entry of its database.
+    """
+    cache = result_cache.QueryCache()
+    tables = result_cache.read_tables("SELECT * FROM users")
+    version = cache.version('users.db', tables)
+    cache.set('users', ['row'], database='users.db', tables=tables)
+    cache.set('other', ['row'], database='other.db', tables=tables)
+
+    cache.invalidate_tables('users.db', [result_cache.written_table("DELETE FROM aux.t")])
+    assert cache.get('users') is None and cache.get('other') == ['row']
+    cache.set('users', ['stale'], database='users.db', tables=tables, version=version)
+    assert cache.get('users') is None, "result read before the write was cached"
+    print("invalidation: write to an unknown table dropped the database's entries")
+
+
+def check_write_during_read(cache_query, transactional):
+    """
+    A write committed while a read is running keeps the read out of the cache.
+    """
+    started = threading.Event()
+    resume = threading.Event()
+
+    @cache_query.with_db_connection
+    @cache_query.cache_query
+    def paused_query(conn, query):
+        rows = conn.execute(query).fetchall()
+        started.set()
+        resume.wait()
+        return rows
+
+    query = "SELECT email FROM users WHERE id = 7"
+    reader = threading.Thread(target=lambda: paused_query(query=query))
+    reader.start()
+    started.wait()
+    transactional.update_user_email(user_id=7, new_email='new7')
+    resume.set()
+    reader.join()
+
+    assert paused_query(query=query) == [('new7',)], "stale result was cached"
+    print("cache: result read before a concurrent write was not cached")
+
+
+def check_rolled_back_read(cache_query, transactional):
+    """
+    A row read inside a transaction that rolls back is never cached.
+    """
+    @cache_query.cache_query
+    def count_users(conn, query):
+        return conn.execute(query).fetchone()[0]
+
+    query = "SELECT COUNT(*) FROM users"
+
+    @transactional.with_db_connection
+    @transactional.transactional
+    def insert_and_abort(conn):
+        conn.execute("INSERT INTO users VALUES (99, 'Ghost', 'ghost')")
+        assert count_users(conn, query) == 11, "transaction did not see its own row"
+        raise RuntimeError("abort")
+
+    try:
+        insert_and_abort()
+    except RuntimeError:
+        pass
+
+    @cache_query.with_db_connection
+    def count_now(conn):
+        return count_users(conn, query)
+
+    assert count_now() == 10, "rolled-back row was served from the cache"
+    print("cache: read inside a rolled-back transaction was not cached")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        create_users_db('users.db')
+        # The numbered modules run their examples against users.db on import
+        transactional = __import__('2-transactional')
+        cache_query = __import__('4-cache_query')
+        import result_cache
+
+        check_parsing(result_cache)
+        check_unknown_write(result_cache)
+        check_write_during_read(cache_query, transactional)
+        check_rolled_back_read(cache_query, transactional)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
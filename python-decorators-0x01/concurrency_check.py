@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for single-flight cached queries: concurrent identical
+misses run the query once and share its result or its error. The other
+*_check.py scripts reuse the users.db helpers defined here.
+
+Runs against a throwaway users.db in a temporary directory.
+
+Usage:
+    python3 concurrency_check.py
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+
+def create_users_db(path, rows=10):
+    """
+    Creates a users table with rows numbered users.
+
+    Args:
+        path (str): Path of the database file
+        rows (int): Number of users to insert
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT)")
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?)",
+        [(i, f"User {i}", f"e{i}") for i in range(1, rows + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def emails(ids):
+    """
+    Returns the committed emails of ids, read on a fresh connection.
+    """
+    conn = sqlite3.connect('users.db')
+    try:
+        placeholders = ', '.join('?' * len(ids))
+        return [email for (email,) in conn.execute(
+            f"SELECT email FROM users WHERE id IN ({placeholders}) ORDER BY id", ids
+        )]
+    finally:
+        conn.close()
+
+
+def check_single_flight(cache_query, threads=8):
+    """
+    Concurrent identical misses run the query once and share its result.
+    """
+    calls = []
+
+    @cache_query.with_db_connection
+    @cache_query.cache_query
+    def slow_query(conn, query):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return conn.execute(query).fetchall()
+
+    barrier = threading.Barrier(threads)
+    results = []
+
+    def reader():
+        barrier.wait()
+        results.append(slow_query(query="SELECT id FROM users WHERE id <= 3"))
+
+    workers = [threading.Thread(target=reader) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(calls) == 1, f"query ran {len(calls)} times"
+    assert len(results) == threads and all(r == results[0] for r in results)
+    print(f"single-flight: {threads} concurrent misses ran the query once")
+
+
+def check_shared_error(cache_query, threads=4):
+    """
+    Waiters receive the leader's error, and the failed result is not cached.
+    """
+    calls = []
+
+    @cache_query.with_db_connection
+    @cache_query.cache_query
+    def failing_query(conn, query):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return conn.execute(query).fetchall()
+
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def reader():
+        barrier.wait()
+        try:
+            failing_query(query="SELECT id FROM users WHERE id = 1")
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=reader) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(calls) == 1 and len(errors) == threads, (len(calls), len(errors))
+    assert failing_query(query="SELECT id FROM users WHERE id = 1") == [(1,)]
+    assert len(calls) == 2, "the failed query was not run again"
+    print(f"single-flight: {threads} waiters shared one error, the next call ran again")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        create_users_db('users.db')
+        # The numbered modules run their examples against users.db on import
+        cache_query = __import__('4-cache_query')
+
+        check_single_flight(cache_query)
+        check_shared_error(cache_query)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
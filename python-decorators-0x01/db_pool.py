@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+SQLite connection pool shared by the with_db_connection decorators.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from statement_cache import DEFAULT_CACHE_SIZE, StatementCachingConnection
+
+
+DEFAULT_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+class ConnectionPool:
+    """
+    A pool of sqlite3 connections to one database file.
+
+    In 'shared' mode up to `size` connections are handed out to any
+    thread; in 'thread' mode every thread keeps its own connection.
+    Pragmas are applied once when a connection is opened, and each
+    checkout runs a cheap health check. Connections are
+    StatementCachingConnection instances, so execute_cached is available.
+    """
+
+    def __init__(self, db_path, size=5, mode='shared', timeout=30,
+                 pragmas=DEFAULT_PRAGMAS, cached_statements=DEFAULT_CACHE_SIZE):
+        """
+        Initialize the pool. Connections are opened lazily.
+
+        Args:
+            db_path (str): Path to the database file
+            size (int): Maximum number of connections in shared mode
+            mode (str): 'shared' or 'thread'
+            timeout (float): Seconds to wait for a free connection
+            pragmas (iterable): Statements run once on every new connection
+            cached_statements (int): Statements and cursors cached per connection
+        """
+        if mode not in ('shared', 'thread'):
+            raise ValueError(f"Unknown pool mode: {mode}")
+        self.db_path = db_path
+        self.size = size
+        self.mode = mode
+        self.timeout = timeout
+        self.pragmas = tuple(pragmas)
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._checked_out = set()
+        self._invalidated = {}
+        self._checkouts = 0
+        self._in_use = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_time = 0.0
+
+    def _connect(self):
+        """
+        Opens a new connection and applies the pragmas.
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            factory=StatementCachingConnection,
+            cached_statements=self.cached_statements
+        )
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        with self._lock:
+            self._created += 1
+        return conn
+
+    def _is_healthy(self, conn):
+        """
+        Checks that a connection can still run a query.
+        """
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        """
+        Closes a connection that will not be reused.
+        """
+        with self._lock:
+            self._discarded += 1
+            self._open -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _checkout_shared(self):
+        """
+        Takes an idle connection, opens a new one, or waits for a release.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._open < self.size
+                    if can_open:
+                        self._open += 1
+                if can_open:
+                    try:
+                        return self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._open -= 1
+                        raise
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        "Timed out waiting for a pooled connection"
+                    )
+                try:
+                    conn = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def _checkout_thread(self):
+        """
+        Returns this thread's connection, opening it on first use.
+
+        Nested borrows on one thread share the connection; only the
+        outermost one health-checks it.
+        """
+        conn = getattr(self._local, 'conn', None)
+        depth = getattr(self._local, 'depth', 0)
+        if depth and conn is not None:
+            self._local.depth = depth + 1
+            return conn
+        if conn is not None and not self._is_healthy(conn):
+            self._discard(conn)
+            conn = None
+        if conn is None:
+            with self._lock:
+                self._open += 1
+            conn = self._connect()
+            self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def acquire(self):
+        """
+        Checks a connection out of the pool.
+
+        Returns:
+            sqlite3.Connection: A healthy connection
+
+        Raises:
+            sqlite3.OperationalError: If none is free within timeout seconds
+        """
+        start = time.perf_counter()
+        if self.mode == 'thread':
+            conn = self._checkout_thread()
+        else:
+            conn = self._checkout_shared()
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._wait_time += time.perf_counter() - start
+            self._checked_out.add(id(conn))
+        return conn
+
+    def owns(self, conn):
+        """
+        Returns True if conn is currently checked out of this pool.
+        """
+        with self._lock:
+            return id(conn) in self._checked_out
+
+    def invalidate(self, conn):
+        """
+        Closes a checked-out connection that failed and frees its slot at
+        once, so a replacement can be acquired while the original borrower
+        still holds it; the borrower's later release() is a no-op.
+
+        Args:
+            conn: Connection previously returned by acquire()
+        """
+        borrows = 1
+        if self.mode == 'thread' and getattr(self._local, 'conn', None) is conn:
+            # Every nested borrow of this thread's connection still releases it
+            borrows = self._local.depth
+            self._local.conn = None
+            self._local.depth = 0
+        with self._lock:
+            self._checked_out.discard(id(conn))
+            self._invalidated[id(conn)] = borrows
+            self._in_use -= borrows
+        self._discard(conn)
+
+    def release(self, conn):
+        """
+        Returns a connection to the pool, rolling back any open transaction.
+
+        In thread mode a nested borrow leaves the connection, and the
+        outer borrower's transaction, untouched.
+
+        Args:
+            conn: Connection previously returned by acquire()
+        """
+        with self._lock:
+            borrows = self._invalidated.get(id(conn))
+            if borrows is not None:
+                if borrows > 1:
+                    self._invalidated[id(conn)] = borrows - 1
+                else:
+                    del self._invalidated[id(conn)]
+                return
+            self._in_use -= 1
+        if self.mode == 'thread':
+            self._local.depth -= 1
+            if self._local.depth:
+                return
+        with self._lock:
+            self._checked_out.discard(id(conn))
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            if self.mode == 'thread':
+                self._local.conn = None
+            self._discard(conn)
+            return
+        if self.mode == 'shared':
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager that borrows a connection and always returns it.
+
+        Yields:
+            sqlite3.Connection: A pooled connection
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """
+        Returns pool metrics.
+
+        Returns:
+            dict: open, in_use, checkouts, created, discarded,
+                total and average wait time in seconds
+        """
+        with self._lock:
+            return {
+                'open': self._open,
+                'in_use': self._in_use,
+                'checkouts': self._checkouts,
+                'created': self._created,
+                'discarded': self._discarded,
+                'wait_time': self._wait_time,
+                'avg_wait_time': self._wait_time / self._checkouts if self._checkouts else 0.0,
+            }
+
+    def close_all(self):
+        """
+        Closes every idle connection (shared mode) and this thread's
+        connection (thread mode).
+        """
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            self._discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def database_path(conn):
+    """
+    Returns the file path of the main database of a connection.
+
+    Args:
+        conn: sqlite3 connection object
+
+    Returns:
+        str: Path of the main database ('' for in-memory databases)
+    """
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == 'main':
+            return path
+    return ''
+
+
+def get_pool(db_path='users.db', **options):
+    """
+    Returns the pool for db_path, creating it on first use.
+
+    Paths are made absolute, so 'users.db' and the path reported by
+    database_path() share one pool.
+
+    Args:
+        db_path (str): Path to the database file
+        **options: ConnectionPool options, only used when the pool is created
+
+    Returns:
+        ConnectionPool: The process-wide pool for db_path
+    """
+    key = os.path.abspath(db_path) if db_path != ':memory:' else db_path
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_path, **options)
+        return pool
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Second-tier query result cache stored in a local SQLite file, shared by
+every process on the host and kept across restarts.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+
+COMPRESS_OVER = 1024
+TOUCH_BATCH = 256
+
+
+def _serialize(value):
+    """
+    Pickles a result, compressing it when that pays off.
+
+    Returns:
+        tuple: (blob, compressed flag)
+    """
+    blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(blob) > COMPRESS_OVER:
+        packed = zlib.compress(blob, 1)
+        if len(packed) < len(blob):
+            return packed, 1
+    return blob, 0
+
+
+def _deserialize(blob, compressed):
+    """
+    Reverses _serialize.
+    """
+    if compressed:
+        blob = zlib.decompress(blob)
+    return pickle.loads(blob)
+
+
+def _digest(key):
+    """
+    Turns a cache key into a stable text key for the table.
+    """
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """
+    Size-bounded result cache in a SQLite file.
+
+    Entries carry an absolute expiry time and the tables they depend on,
+    so expiry and table invalidation work across processes. The file
+    also keeps a generation counter per (database, table), bumped by
+    every invalidation, so processes can tell whether results they hold
+    in memory are still current and refuse to store stale ones. When the
+    file grows past max_bytes the least recently used entries are removed.
+    Reads do not write: their last-used times are buffered and saved in
+    batches, with the next set() or once TOUCH_BATCH reads are pending.
+    """
+
+    def __init__(self, path='query_cache.db', max_bytes=256 * 1024 * 1024,
+                 any_table='*'):
+        """
+        Opens (or creates) the cache file.
+
+        Args:
+            path (str): Path of the cache file
+            max_bytes (int): Maximum total size of stored results
+            any_table (str): Marker for results with unknown tables; they
+                depend on every write to their database
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.any_table = any_table
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._touched = {}
+
+    def _connection(self):
+        """
+        Returns this process's connection, reopening it after a fork.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    compressed INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    last_used REAL NOT NULL,
+                    database TEXT NOT NULL,
+                    tables TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON entries (last_used)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS generations (
+                    database TEXT NOT NULL,
+                    tbl TEXT NOT NULL,
+                    generation INTEGER NOT NULL,
+                    PRIMARY KEY (database, tbl)
+                )
+            """)
+            self._conn = conn
+            self._pid = os.getpid()
+            self._touched = {}
+        return self._conn
+
+    def _dependencies(self, tables):
+        """
+        Returns the generation counters a result on tables depends on.
+        """
+        if self.any_table in tables:
+            # Unknown dependencies change with any write to the database
+            return (self.any_table,)
+        # '' is bumped by writes to unknown tables
+        return tuple(sorted(set(tables) | {''}))
+
+    def _read_generations(self, conn, database, tables):
+        """
+        Reads the generations of tables in database.
+        """
+        names = self._dependencies(tables)
+        if not names:
+            return ()
+        placeholders = ', '.join('?' * len(names))
+        found = dict(conn.execute(
+            f"SELECT tbl, generation FROM generations "
+            f"WHERE database = ? AND tbl IN ({placeholders})",
+            (database,) + names
+        ).fetchall())
+        return tuple(found.get(name, 0) for name in names)
+
+    def generations(self, database, tables):
+        """
+        Returns the current generation of the tables a query reads, as
+        seen by every process sharing the file.
+
+        Args:
+            database (str): Database path the query reads from
+            tables (iterable): Tables the query reads
+
+        Returns:
+            tuple: Opaque version to pass to set()
+        """
+        with self._lock:
+            return self._read_generations(self._connection(), database, tuple(tables))
+
+    def get(self, key):
+        """
+        Looks a result up.
+
+        Args:
+            key: Cache key (as used by QueryCache)
+
+        Returns:
+            tuple: (value, seconds left or None for no expiry, database,
+                tables, generations of the tables read together with the
+                entry), or None on a miss
+        """
+        digest = _digest(key)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # One read transaction, so the generations match the entry
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(
+                    "SELECT value, compressed, expires_at, database, tables "
+                    "FROM entries WHERE key = ?",
+                    (digest,)
+                ).fetchone()
+                if row is not None:
+                    tables = tuple(table for table in row[4].split(',') if table)
+                    version = self._read_generations(conn, row[3], tables)
+            finally:
+                conn.execute("COMMIT")
+            if row is None:
+                return None
+            value, compressed, expires_at, database, _ = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM entries WHERE key = ?", (digest,))
+                return None
+            self._touched[digest] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                try:
+                    self._save_touches(conn)
+                except sqlite3.OperationalError:
+                    # Busy; the touches are kept for the next attempt
+                    pass
+        try:
+            value = _deserialize(value, compressed)
+        except (pickle.UnpicklingError, zlib.error, EOFError):
+            return None
+        remaining = expires_at - now if expires_at is not None else None
+        return value, remaining, database, tables, version
+
+    def _save_touches(self, conn):
+        """
+        Writes the buffered last-used times; the caller holds the lock.
+        """
+        if not self._touched:
+            return
+        rows = [(used, digest) for digest, used in self._touched.items()]
+        if conn.in_transaction:
+            conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?", rows)
+        else:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?", rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self._touched.clear()
+
+    def set(self, key, value, ttl=None, database='', tables=(), version=None):
+        """
+        Stores a result and evicts least recently used entries past max_bytes.
+
+        Args:
+            key: Cache key
+            value: Result to store; must be picklable
+            ttl (float, optional): Seconds the entry stays valid
+            database (str): Database path the result was read from
+            tables (iterable): Tables the result depends on
+            version (tuple, optional): generations(database, tables) taken
+                before the query ran; the result is not stored if one of
+                the tables was invalidated since, by any process
+
+        Returns:
+            bool: False if the result was stale and not stored
+        """
+        blob, compressed = _serialize(value)
+        if len(blob) > self.max_bytes:
+            return True
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        tables = tuple(tables)
+        table_list = ',' + ','.join(sorted(tables)) + ','
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if (version is not None
+                        and self._read_generations(conn, database, tables) != version):
+                    conn.execute("ROLLBACK")
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (_digest(key), blob, compressed, len(blob), expires_at, now,
+                     database, table_list)
+                )
+                self._save_touches(conn)
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def _evict(self, conn):
+        """
+        Removes expired entries, then the least recently used ones until
+        the total size fits; runs inside the caller's transaction.
+        """
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                     (time.time(),))
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        for digest, size in conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (digest,))
+            total -= size
+
+    def invalidate_tables(self, database, tables):
+        """
+        Bumps the generations of tables and removes the entries of database
+        that depend on one of them, or on any table (unknown dependencies).
+        If tables contains any_table (a write to an unknown table), every
+        entry of database is removed.
+
+        Args:
+            database (str): Database path that was written to
+            tables (iterable): Names of the tables that were written
+
+        Returns:
+            int: Number of entries removed
+        """
+        names = [self.any_table] + [table.lower() for table in tables]
+        unknown = self.any_table in names[1:]
+        if unknown:
+            names = [self.any_table, '']
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO generations VALUES (?, ?, 1) "
+                    "ON CONFLICT (database, tbl) DO UPDATE SET generation = generation + 1",
+                    [(database, name) for name in names]
+                )
+                if unknown:
+                    cursor = conn.execute("DELETE FROM entries WHERE database = ?",
+                                          (database,))
+                else:
+                    condition = " OR ".join(["tables LIKE ?"] * len(names))
+                    cursor = conn.execute(
+                        f"DELETE FROM entries WHERE database = ? AND ({condition})",
+                        [database] + [f"%,{name},%" for name in names]
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return cursor.rowcount
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        with self._lock:
+            self._connection().execute("DELETE FROM entries")
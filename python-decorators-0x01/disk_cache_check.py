@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for the shared second cache tier: a write invalidated
+by one process reaches the memory of every process sharing the file,
+and a tier that cannot be invalidated is disabled.
+
+Two QueryCache instances with their own DiskCache connections to one
+file stand in for two processes. Runs in a temporary directory.
+
+Usage:
+    python3 disk_cache_check.py
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+
+def make_cache(result_cache, disk_cache, path):
+    """
+    Returns a QueryCache with its own connection to the tier at path.
+    """
+    cache = result_cache.QueryCache()
+    cache.second_tier = disk_cache.DiskCache(path, any_table=result_cache.ANY_TABLE)
+    return cache
+
+
+def check_memory_hit(result_cache, disk_cache):
+    """
+    A result held in one process's memory is dropped after another
+    process invalidates its table.
+    """
+    reader = make_cache(result_cache, disk_cache, 'shared.db')
+    writer = make_cache(result_cache, disk_cache, 'shared.db')
+    tables = result_cache.read_tables("SELECT * FROM users")
+    reader.set('key', ['old'], database='users.db', tables=tables,
+               version=reader.version('users.db', tables))
+    assert reader.get('key') == ['old']
+
+    writer.invalidate_tables('users.db', ['users'])
+    assert reader.get('key') is None, "memory hit served a result written elsewhere"
+    print("disk tier: another process's write invalidated this process's memory")
+
+
+def check_stale_set(result_cache, disk_cache):
+    """
+    A result read before another process's write is not stored by either tier.
+    """
+    reader = make_cache(result_cache, disk_cache, 'stale.db')
+    writer = make_cache(result_cache, disk_cache, 'stale.db')
+    tables = result_cache.read_tables("SELECT * FROM orders o JOIN users u ON u.id = o.user_id")
+    version = reader.version('users.db', tables)
+    # The query runs here, while another process commits a write
+    writer.invalidate_tables('users.db', ['orders'])
+    reader.set('key', ['stale'], database='users.db', tables=tables, version=version)
+
+    assert reader.get('key') is None and writer.get('key') is None
+    assert reader.stats()['stale_sets'] == 1
+    print("disk tier: result read before another process's write was not cached")
+
+
+def check_failed_invalidation(result_cache, disk_cache):
+    """
+    A tier that keeps failing to invalidate is disabled, along with the
+    memory entries checked against it.
+    """
+    class Broken(disk_cache.DiskCache):
+        def invalidate_tables(self, database, tables):
+            raise sqlite3.OperationalError("database is locked")
+
+    cache = result_cache.QueryCache()
+    cache.second_tier = Broken('broken.db', any_table=result_cache.ANY_TABLE)
+    cache.set('key', ['cached'], database='users.db', tables=('orders',))
+    assert cache.get('key') == ['cached']
+
+    cache.invalidate_tables('users.db', ['users'])
+    assert cache.second_tier is None
+    assert cache.get('key') is None
+    assert cache.stats()['second_tier_failures'] == 1
+    print("disk tier: failed invalidation disabled the tier")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import disk_cache
+        import result_cache
+
+        check_memory_hit(result_cache, disk_cache)
+        check_stale_set(result_cache, disk_cache)
+        check_failed_invalidation(result_cache, disk_cache)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Group commit: many @transactional calls share one transaction and one
+commit instead of committing (and syncing to disk) once each.
+"""
+
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+import db_pool
+import result_cache
+
+
+_local = threading.local()
+
+
+def current_scope():
+    """
+    Returns the innermost GroupCommit open on this thread.
+
+    Returns:
+        GroupCommit: The active scope, or None
+    """
+    scopes = getattr(_local, 'scopes', None)
+    return scopes[-1] if scopes else None
+
+
+class GroupCommit:
+    """
+    Scope that batches @transactional calls into group commits.
+
+    Inside `with GroupCommit() as batch:` every @transactional function
+    decorated with the 2-transactional with_db_connection runs on the
+    scope's connection, inside a savepoint of a shared transaction, and
+    returns a concurrent.futures.Future instead of its result. The group
+    commits once max_batch calls have succeeded or max_delay seconds
+    after its first call, whichever comes first, and when the scope exits.
+
+    A call that raises is rolled back to its savepoint and its future
+    fails at once; the rest of the group is unaffected. If the commit
+    fails, or the with block raises, the whole pending group is rolled
+    back and every pending future fails with that error. Futures of
+    successful calls resolve only after their group has committed.
+    """
+
+    def __init__(self, db_path='users.db', max_batch=100, max_delay=0.05):
+        """
+        Args:
+            db_path (str): Database the calls write to
+            max_batch (int): Successful calls per commit
+            max_delay (float): Seconds a call may wait for its commit
+        """
+        self.pool = db_pool.get_pool(db_path)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.conn = None
+        self.commits = 0
+        self._lock = threading.RLock()
+        self._pending = []
+        self._written = set()
+        self._timer = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        if not hasattr(_local, 'scopes'):
+            _local.scopes = []
+        _local.scopes.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.scopes.remove(self)
+        try:
+            if exc is None:
+                self.flush()
+            else:
+                with self._lock:
+                    self._fail_group(exc)
+        finally:
+            self.pool.release(self.conn)
+            self.conn = None
+        return False
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Runs func(conn, *args, **kwargs) inside the current group.
+
+        Args:
+            func: Function taking the connection as its first argument
+
+        Returns:
+            concurrent.futures.Future: Resolves to func's result once the
+                group commits, or to the error that rolled it back
+        """
+        future = Future()
+        conn = self.conn
+        with self._lock:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            written = set()
+
+            def track(statement):
+                table = result_cache.written_table(statement)
+                if table:
+                    written.add(table)
+
+            conn.execute("SAVEPOINT group_call")
+            conn.set_trace_callback(track)
+            try:
+                result = func(conn, *args, **kwargs)
+            except Exception as e:
+                conn.set_trace_callback(None)
+                future.set_exception(e)
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK TO group_call")
+                    conn.execute("RELEASE group_call")
+                else:
+                    # SQLite rolled the whole transaction back on this error
+                    self._fail_group(e)
+                return future
+            conn.set_trace_callback(None)
+            conn.execute("RELEASE group_call")
+
+            self._pending.append((future, result))
+            self._written |= written
+            if len(self._pending) >= self.max_batch:
+                self._commit()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def flush(self):
+        """
+        Commits the pending group now.
+
+        Returns:
+            int: Number of calls committed
+        """
+        with self._lock:
+            if self.conn is None:
+                return 0
+            return self._commit()
+
+    def _commit(self):
+        """
+        Commits the pending group and resolves its futures; the caller
+        holds the lock.
+        """
+        self._cancel_timer()
+        pending, written = self._pending, self._written
+        self._pending, self._written = [], set()
+        if not self.conn.in_transaction:
+            return 0
+        try:
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self._pending = pending
+            self._fail_group(e)
+            return 0
+        self.commits += 1
+        if written:
+            result_cache.default_cache.invalidate_tables(
+                db_pool.database_path(self.conn), written
+            )
+        for future, result in pending:
+            future.set_result(result)
+        return len(pending)
+
+    def _fail_group(self, error):
+        """
+        Rolls the pending group back and fails its futures; the caller
+        holds the lock.
+        """
+        self._cancel_timer()
+        pending = self._pending
+        self._pending, self._written = [], set()
+        try:
+            self.conn.rollback()
+        except sqlite3.Error:
+            pass
+        for future, _ in pending:
+            future.set_exception(error)
+
+    def _cancel_timer(self):
+        """
+        Stops the pending time-window flush, if any.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
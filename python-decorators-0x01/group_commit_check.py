@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for group commit: a failing call rolls back alone, an
+aborted scope rolls back its whole group, and successful calls share
+commits.
+
+Runs against a throwaway users.db in a temporary directory.
+
+Usage:
+    python3 group_commit_check.py
+"""
+
+import os
+import sys
+import tempfile
+
+from concurrency_check import create_users_db, emails
+
+
+def check_group_commit(transactional, group_commit):
+    """
+    A failing call rolls back alone; an aborted scope rolls back its group.
+    """
+    @transactional.with_db_connection
+    @transactional.transactional
+    def failing_update(conn, user_id):
+        conn.execute("UPDATE users SET email = 'lost' WHERE id = ?", (user_id,))
+        raise ValueError("rejected")
+
+    with group_commit.GroupCommit(max_batch=3) as batch:
+        futures = [transactional.update_user_email(user_id=i, new_email=f"g{i}")
+                   for i in (1, 2, 3, 4)]
+        failed = failing_update(5)
+    assert all(future.result() is None for future in futures)
+    assert isinstance(failed.exception(), ValueError)
+    assert emails([1, 2, 3, 4, 5]) == ['g1', 'g2', 'g3', 'g4', 'e5']
+    assert batch.commits == 2, f"{batch.commits} commits"
+
+    try:
+        with group_commit.GroupCommit() as batch:
+            pending = transactional.update_user_email(user_id=6, new_email='aborted')
+            raise KeyError("abort")
+    except KeyError:
+        pass
+    assert isinstance(pending.exception(), KeyError)
+    assert emails([6]) == ['e6']
+    print("group commit: failing call and aborted group rolled back, "
+          "4 calls in 2 commits")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        create_users_db('users.db')
+        # The numbered modules run their examples against users.db on import
+        transactional = __import__('2-transactional')
+        import group_commit
+
+        check_group_commit(transactional, group_commit)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
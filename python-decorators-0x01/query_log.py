@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Structured, sampled query instrumentation with a non-blocking log writer.
+"""
+
+import atexit
+import functools
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+
+logger = logging.getLogger('query_log')
+
+_listener = None
+_listener_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_DECORATOR_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats dict messages as one JSON object per line.
+    """
+
+    def format(self, record):
+        """
+        Serializes record.msg if it is a dict, otherwise formats normally.
+        """
+        if isinstance(record.msg, dict):
+            return json.dumps(record.msg, default=repr)
+        return super().format(record)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues records as they are, leaving formatting
+    to the listener thread instead of the thread running the query.
+    """
+
+    def prepare(self, record):
+        """
+        Returns the record unchanged.
+        """
+        return record
+
+
+def configure(handler=None):
+    """
+    Starts the background writer for query records.
+
+    Records are put on an in-memory queue by the calling thread and
+    serialized and written by a QueueListener thread, so formatting and
+    slow handlers never block queries. Called automatically on first use
+    with a stderr handler.
+
+    Args:
+        handler (logging.Handler, optional): Where records are written
+    """
+    with _listener_lock:
+        _start(handler)
+
+
+def _start(handler):
+    """
+    Replaces the background writer; the caller holds _listener_lock.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    if handler is None:
+        handler = logging.StreamHandler(sys.stderr)
+    if handler.formatter is None:
+        handler.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    logger.handlers = [_DeferredQueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+
+
+def _ensure_started():
+    """
+    Starts the default writer unless one is running; safe to call from
+    many threads at once.
+    """
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _start(None)
+
+
+def shutdown():
+    """
+    Flushes pending records and stops the background writer.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown)
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query):
+    """
+    Normalizes a query so the same statement with different literals
+    groups together.
+
+    Args:
+        query (str): SQL query
+
+    Returns:
+        tuple: (normalized query, short hash of it)
+    """
+    normalized = _STRING_LITERAL.sub('?', query)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _IN_LIST.sub('(?)', normalized)
+    normalized = _WHITESPACE.sub(' ', normalized).strip()
+    digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+    return normalized, digest
+
+
+def _row_count(result):
+    """
+    Returns how many rows a decorated function returned.
+
+    Cursors report rowcount, which is only known for writes; None is
+    returned for a SELECT cursor (rowcount -1).
+    """
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, sqlite3.Cursor):
+        return result.rowcount if result.rowcount >= 0 else None
+    return 1
+
+
+def _caller(frame):
+    """
+    Returns file:line of the code that called the decorated function.
+
+    Frames of the wrapper functions of decorators stacked around it (the
+    functions named wrapper in this directory, such as with_db_connection)
+    are skipped.
+    """
+    while (frame.f_back is not None
+           and frame.f_code.co_name == 'wrapper'
+           and os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == _DECORATOR_DIR):
+        frame = frame.f_back
+    return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+
+def _redact(value):
+    """
+    Replaces a parameter value with its type name.
+    """
+    return f"<{type(value).__name__}>"
+
+
+def instrument_queries(func=None, *, sample_rate=1.0, redact=True):
+    """
+    Decorator that records one structured log entry per sampled query.
+
+    Each entry holds the query fingerprint and normalized text, the
+    parameters (type names only when redact is True), wall time in
+    milliseconds, rows returned (None when unknown), the caller (outside
+    any stacked decorator wrappers) and any error. The query is the
+    query keyword argument, or the first positional argument after the
+    connection if it is a string; otherwise it is logged as null and every
+    argument is a parameter. Unsampled calls go straight to the function.
+
+    Args:
+        func: The function to be decorated
+        sample_rate (float): Fraction of calls to record (0.0 to 1.0)
+        redact (bool): Log parameter types instead of values
+
+    Returns:
+        wrapper: The wrapped function that records its queries
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if sample_rate < 1.0 and random.random() >= sample_rate:
+                return func(*args, **kwargs)
+
+            # Extract query from kwargs or args, skipping a leading connection;
+            # a non-string first argument (e.g. an id) is a parameter
+            positional = args
+            if positional and isinstance(positional[0], sqlite3.Connection):
+                positional = positional[1:]
+            query = kwargs.get('query')
+            if query is None and positional and isinstance(positional[0], str):
+                query, positional = positional[0], positional[1:]
+            params = list(positional) + [
+                value for name, value in kwargs.items() if name != 'query'
+            ]
+
+            caller = _caller(sys._getframe(1))
+            start = time.perf_counter()
+            error = None
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                _ensure_started()
+                normalized, digest = fingerprint(query) if isinstance(query, str) else (None, None)
+                logger.info({
+                    'ts': time.time(),
+                    'function': func.__qualname__,
+                    'fingerprint': digest,
+                    'query': normalized,
+                    'params': [_redact(p) for p in params] if redact else params,
+                    'ms': round(elapsed_ms, 3),
+                    'rows': None if error else _row_count(result),
+                    'caller': caller,
+                    'error': error,
+                })
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
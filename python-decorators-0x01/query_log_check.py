@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for structured query logging: which argument is the
+query, and starting the log writer from many threads at once.
+
+Runs against a throwaway users.db in a temporary directory.
+
+Usage:
+    python3 query_log_check.py
+"""
+
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+from concurrency_check import create_users_db
+
+
+class ListHandler(logging.Handler):
+    """
+    Collects the logged records' messages.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+
+    def emit(self, record):
+        self.entries.append(record.msg)
+
+
+def check_arguments(query_log):
+    """
+    A non-string first argument is a parameter, not the query.
+    """
+    handler = ListHandler()
+    query_log.configure(handler)
+
+    @query_log.instrument_queries(redact=False)
+    def get_user_by_id(conn, user_id):
+        return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchall()
+
+    @query_log.instrument_queries(redact=False)
+    def fetch(conn, query, limit):
+        return conn.execute(query, (limit,)).fetchall()
+
+    conn = sqlite3.connect('users.db')
+    get_user_by_id(conn, 42)
+    fetch(conn, "SELECT * FROM users LIMIT ?", 3)
+    conn.close()
+    query_log.shutdown()
+
+    by_id, by_query = handler.entries
+    assert by_id['query'] is None and by_id['params'] == [42], by_id
+    assert by_query['query'] == "SELECT * FROM users LIMIT ?" and by_query['params'] == [3]
+    print("arguments: id argument logged as a parameter, query string as the query")
+
+
+def check_concurrent_start(query_log, threads=16):
+    """
+    Threads logging their first query at once start a single writer.
+    """
+    started = []
+    original = query_log._start
+
+    def counting_start(handler):
+        started.append(handler)
+        original(handler or logging.NullHandler())
+
+    query_log._start = counting_start
+
+    @query_log.instrument_queries
+    def noop(query):
+        return None
+
+    barrier = threading.Barrier(threads)
+
+    def run():
+        barrier.wait()
+        noop("SELECT 1")
+
+    try:
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        query_log._start = original
+        query_log.shutdown()
+    assert len(started) == 1, f"{len(started)} writers started"
+    print(f"writer: {threads} threads logging at once started one writer")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        create_users_db('users.db')
+        import query_log
+
+        check_arguments(query_log)
+        check_concurrent_start(query_log)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
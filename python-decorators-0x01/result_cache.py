@@ -0,0 +1,648 @@
+#!/usr/bin/env python3
+"""
+Bounded, thread-safe result cache used by the cache_query decorator.
+"""
+
+import pickle
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+ANY_TABLE = '*'
+# Generation bumped by writes to unknown tables; every known table depends on it
+ALL_TABLES = ''
+INVALIDATE_ATTEMPTS = 3
+
+# Version of a second tier that could not be read; never current
+_UNKNOWN = object()
+
+_TOKEN_PATTERN = re.compile(
+    r"""\s+|--[^\n]*|/\*.*?(?:\*/|$)|'(?:[^']|'')*'?"""   # skipped
+    r'|"((?:[^"]|"")*)"?|`((?:[^`]|``)*)`?|\[([^\]]*)\]?'   # quoted names
+    r'|(\w+)|(.)',                                            # words, symbols
+    re.DOTALL
+)
+_CLAUSE_WORDS = frozenset((
+    'where', 'group', 'having', 'window', 'order', 'limit', 'union',
+    'except', 'intersect', 'returning', 'set', 'values', 'select',
+))
+_SUBQUERY_WORDS = frozenset(('select', 'with', 'values'))
+_WRITE_WORDS = frozenset(('insert', 'replace', 'update', 'delete'))
+_SKIPPED_WORDS = frozenset((
+    'or', 'replace', 'rollback', 'abort', 'fail', 'ignore', 'into', 'from',
+    'table', 'if', 'exists',
+))
+_MAIN_SCHEMAS = frozenset(('main', 'temp'))
+
+
+def _tokens(sql):
+    """
+    Splits SQL into (kind, text) tokens, dropping comments and literals.
+
+    kind is 'name' for quoted identifiers, 'word' for bare words and
+    'symbol' for anything else; bare words are lower-cased.
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(sql or ''):
+        double, back, bracket, word, symbol = match.groups()
+        quoted = next((name for name in (double, back, bracket) if name is not None), None)
+        if quoted is not None:
+            tokens.append(('name', quoted.lower()))
+        elif word is not None:
+            tokens.append(('word', word.lower()))
+        elif symbol is not None:
+            tokens.append(('symbol', symbol))
+    return tokens
+
+
+def _table_name(tokens, i):
+    """
+    Reads a possibly schema-qualified table name at tokens[i].
+
+    Returns:
+        tuple: (table name, or None if it is not a table of the main
+            database, index after the name)
+    """
+    kind, name = tokens[i]
+    i += 1
+    if i + 1 < len(tokens) and tokens[i] == ('symbol', '.') and tokens[i + 1][0] != 'symbol':
+        if name not in _MAIN_SCHEMAS:
+            # A table of an attached database
+            return None, i + 2
+        name = tokens[i + 1][1]
+        i += 2
+    return name, i
+
+
+def read_tables(sql):
+    """
+    Returns the tables a SELECT statement reads from.
+
+    Every FROM clause, including comma lists, joins, parenthesised joins
+    and subqueries, is walked for table names. Views and tables of
+    attached databases cannot be tracked.
+
+    Args:
+        sql (str): SQL query
+
+    Returns:
+        frozenset: Lower-cased table names, or {ANY_TABLE} if the query
+            could not be parsed with certainty, so the entry is
+            invalidated by any write
+    """
+    tokens = _tokens(sql)
+    tables = set()
+    # One frame per open parenthesis: [in a FROM clause, expecting a table]
+    frames = [[False, False]]
+    i = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        frame = frames[-1]
+        if frame[1]:
+            frame[1] = False
+            if text == '(':
+                # A subquery, or a parenthesised join list
+                nested = i + 1 < len(tokens) and tokens[i + 1][1] not in _SUBQUERY_WORDS
+                frames.append([nested, nested])
+                i += 1
+                continue
+            if kind == 'symbol':
+                return frozenset((ANY_TABLE,))
+            name, i = _table_name(tokens, i)
+            if name is None:
+                return frozenset((ANY_TABLE,))
+            if i < len(tokens) and tokens[i][1] == '(':
+                # A table-valued function, not a table
+                continue
+            tables.add(name)
+            continue
+        if text == '(':
+            frames.append([False, False])
+        elif text == ')':
+            if len(frames) > 1:
+                frames.pop()
+        elif text == 'from' and kind == 'word':
+            frame[0] = frame[1] = True
+        elif frame[0] and kind == 'word':
+            if text == 'join':
+                frame[1] = True
+            elif text in _CLAUSE_WORDS:
+                frame[0] = False
+        elif frame[0] and text == ',':
+            frame[1] = True
+        i += 1
+    if frames[-1][1]:
+        # A FROM or JOIN without a table
+        return frozenset((ANY_TABLE,))
+    return frozenset(tables) or frozenset((ANY_TABLE,))
+
+
+def written_table(sql):
+    """
+    Returns the table a write statement modifies.
+
+    Statements that start with a WITH clause are searched for the write
+    that follows it.
+
+    Args:
+        sql (str): SQL statement
+
+    Returns:
+        str: Lower-cased table name, ANY_TABLE for a write whose table
+            could not be determined, or None for statements that do not write
+    """
+    tokens = _tokens(sql)
+    if not tokens:
+        return None
+    i = 0
+    if tokens[0] == ('word', 'with'):
+        depth = 0
+        for i, (kind, text) in enumerate(tokens):
+            if text == '(':
+                depth += 1
+            elif text == ')':
+                depth -= 1
+            elif depth == 0 and kind == 'word' and text in _WRITE_WORDS:
+                break
+        else:
+            return None
+    verb = tokens[i][1]
+    if tokens[i][0] != 'word' or verb not in _WRITE_WORDS | {'drop', 'alter'}:
+        return None
+    if verb in ('drop', 'alter'):
+        if i + 1 >= len(tokens) or tokens[i + 1][1] != 'table':
+            return None
+    i += 1
+    while i < len(tokens) and tokens[i][0] == 'word' and tokens[i][1] in _SKIPPED_WORDS:
+        i += 1
+    if i >= len(tokens) or tokens[i][0] == 'symbol':
+        return ANY_TABLE
+    name, _ = _table_name(tokens, i)
+    return name if name is not None else ANY_TABLE
+
+
+def estimate_size(value):
+    """
+    Roughly estimates the memory used by a query result in bytes.
+
+    Counts the container, its rows and their immediate values, which is
+    enough to bound a cache of fetchall() results.
+
+    Args:
+        value: Result to measure (typically a list of tuples)
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for row in value:
+            size += sys.getsizeof(row)
+            if isinstance(row, (list, tuple)):
+                size += sum(sys.getsizeof(item) for item in row)
+    return size
+
+
+class QueryCache:
+    """
+    An LRU cache of query results with a maximum entry count, a maximum
+    total size in bytes and a per-entry time to live.
+
+    An optional second tier (e.g. disk_cache.DiskCache) is consulted on
+    misses, written through on set and invalidated together with memory.
+
+    Every invalidation bumps a generation counter per (database, table).
+    A reader takes version() before running its query and passes it to
+    set(), which drops the result if a write was invalidated meanwhile.
+    With a second tier the counters kept in it are checked as well, on
+    set and on every memory hit, so writes committed by other processes
+    sharing the tier invalidate this process's memory too. If the second
+    tier cannot be invalidated after a write it is disabled, since other
+    processes could otherwise keep serving its stale entries.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=300):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of cached results
+            max_bytes (int): Maximum estimated size of all cached results
+            ttl (float): Default seconds a result stays valid, None for no expiry
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._dependents = {}
+        self._generations = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+        self.second_tier_hits = 0
+        self.second_tier = None
+        self.second_tier_failures = 0
+
+    def get(self, key, default=None):
+        """
+        Returns the cached result for key and marks it recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            The cached result, or default if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, _, expires_at, database, tables, shared = entry
+                if expires_at is not None and time.monotonic() >= expires_at:
+                    self._remove(key)
+                    self.expirations += 1
+                    entry = None
+        if entry is not None:
+            # Another process may have written the tables since
+            current = self._shared_version(database, tables) if shared is not None else None
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    if current == shared:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return value
+                    self._remove(key)
+                    self.invalidations += 1
+
+        tier = self.second_tier
+        if tier is None:
+            found = None
+        else:
+            with self._lock:
+                generations = dict(self._generations)
+            try:
+                found = tier.get(key)
+            except sqlite3.Error:
+                # A busy or broken cache file is a miss, not a failed query
+                found = None
+        with self._lock:
+            if found is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.second_tier_hits += 1
+        # Promote into memory for the time the entry has left
+        value, remaining, database, tables, shared = found
+        self._store(key, value, remaining, database, tables,
+                    self._read_version(generations, database, tables), shared)
+        return value
+
+    def version(self, database, tables):
+        """
+        Returns the current generation of the tables a query reads.
+
+        Args:
+            database (str): Database path the query reads from
+            tables (iterable): Tables the query reads
+
+        Returns:
+            tuple: Opaque version to pass to set()
+        """
+        with self._lock:
+            local = self._read_version(self._generations, database, tables)
+        return local, self._shared_version(database, tables)
+
+    def _shared_version(self, database, tables):
+        """
+        Reads the generations of tables kept in the second tier.
+
+        Returns:
+            tuple: The generations, None without a second tier, or
+                _UNKNOWN if the cache file could not be read
+        """
+        tier = self.second_tier
+        if tier is None:
+            return None
+        try:
+            return tier.generations(database, tables)
+        except sqlite3.Error:
+            return _UNKNOWN
+
+    @staticmethod
+    def _read_version(generations, database, tables):
+        """
+        Reads the generations of tables from a counters dict.
+        """
+        if ANY_TABLE in tables:
+            # Unknown dependencies change with any write to the database
+            return (generations.get((database, ANY_TABLE), 0),)
+        return tuple(generations.get((database, table), 0)
+                     for table in sorted(set(tables) | {ALL_TABLES}))
+
+    def set(self, key, value, ttl=None, database='', tables=(), version=None):
+        """
+        Stores a result, evicting least recently used entries as needed.
+
+        Results larger than max_bytes on their own are not cached.
+
+        Args:
+            key: Cache key
+            value: Result to cache
+            ttl (float, optional): Seconds this entry stays valid,
+                overriding the cache default
+            database (str): Database path the result was read from
+            tables (iterable): Tables the result depends on, used by
+                invalidate_tables
+            version (tuple, optional): version(database, tables) taken
+                before the query ran; the result is not cached if one of
+                the tables was invalidated since, by this process or by
+                any process sharing the second tier
+        """
+        ttl = self.ttl if ttl is None else ttl
+        tables = tuple(tables)
+        if version is None:
+            local, shared = None, self._shared_version(database, tables)
+        else:
+            local, shared = version
+        if shared is _UNKNOWN:
+            # Without the shared generations the result cannot be vouched for
+            return
+        tier = self.second_tier
+        if tier is not None and shared is not None:
+            try:
+                stored = tier.set(key, value, ttl, database, tables, shared)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                # Unpicklable results stay memory-only
+                stored = self._shared_version(database, tables) == shared
+            except sqlite3.Error:
+                # A busy cache file cannot confirm the result is current
+                return
+            if not stored:
+                with self._lock:
+                    self.stale_sets += 1
+                return
+        self._store(key, value, ttl, database, tables, local, shared)
+
+    def _store(self, key, value, ttl, database, tables, version=None, shared=None):
+        """
+        Stores a result in memory only.
+
+        Args:
+            shared (tuple, optional): Second-tier generations the result
+                is current for, checked again on every hit
+
+        Returns:
+            bool: False if the result is stale for version
+        """
+        size = estimate_size(value)
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if (version is not None
+                    and self._read_version(self._generations, database, tables) != version):
+                self.stale_sets += 1
+                return False
+            if size > self.max_bytes:
+                return True
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at, database, tables, shared)
+            for table in tables:
+                self._dependents.setdefault((database, table), set()).add(key)
+            self._bytes += size
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def _remove(self, key):
+        """
+        Drops one entry; the caller holds the lock.
+        """
+        _, size, _, database, tables, _ = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            dependency = (database, table)
+            keys = self._dependents.get(dependency)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._dependents[dependency]
+
+    def invalidate_tables(self, database, tables):
+        """
+        Drops every entry that depends on one of tables in database.
+
+        Entries whose tables could not be determined are dropped by any
+        write, and a write to ANY_TABLE (a table that could not be
+        determined) drops every entry of the database. A second tier is retried INVALIDATE_ATTEMPTS times and then
+        disabled, as its entries could no longer be trusted.
+
+        Args:
+            database (str): Database path that was written to
+            tables (iterable): Names of the tables that were written
+
+        Returns:
+            int: Number of entries removed
+        """
+        tables = [table.lower() for table in tables]
+        unknown = ANY_TABLE in tables
+        bumped = [ALL_TABLES] if unknown else tables
+        with self._lock:
+            for dependency in [ANY_TABLE] + bumped:
+                dependency = (database, dependency)
+                self._generations[dependency] = self._generations.get(dependency, 0) + 1
+            if unknown:
+                keys = {key for key, entry in self._entries.items() if entry[3] == database}
+            else:
+                keys = set(self._dependents.get((database, ANY_TABLE), ()))
+                for table in tables:
+                    keys.update(self._dependents.get((database, table), ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        tier = self.second_tier
+        if tier is not None:
+            for attempt in range(INVALIDATE_ATTEMPTS):
+                try:
+                    tier.invalidate_tables(database, tables)
+                    break
+                except sqlite3.Error:
+                    time.sleep(0.05 * 2 ** attempt)
+            else:
+                # The write is already committed; nothing may be served
+                # from a tier that still holds results from before it
+                with self._lock:
+                    self.second_tier_failures += 1
+                    if self.second_tier is tier:
+                        self.second_tier = None
+                        self._drop_tier_entries()
+        return len(keys)
+
+    def _drop_tier_entries(self):
+        """
+        Drops the entries checked against a disabled second tier; the
+        caller holds the lock.
+        """
+        for key in [key for key, entry in self._entries.items() if entry[5] is not None]:
+            self._remove(key)
+
+    def __contains__(self, key):
+        """
+        Returns True if key is cached, even if it has expired.
+        """
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        """
+        Returns the number of cached entries.
+        """
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """
+        Removes every entry, including the second tier.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._dependents.clear()
+            self._bytes = 0
+        if self.second_tier is not None:
+            self.second_tier.clear()
+
+    def stats(self):
+        """
+        Returns cache counters.
+
+        Returns:
+            dict: entries, bytes, hits (of which second_tier_hits),
+                misses, evictions, expirations, invalidations,
+                stale_sets (results not cached because of a concurrent
+                write) and second_tier_failures (failed invalidations
+                that disabled the second tier)
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'stale_sets': self.stale_sets,
+                'second_tier_hits': self.second_tier_hits,
+                'second_tier_failures': self.second_tier_failures,
+            }
+
+
+class _Call:
+    """
+    One in-flight execution that other callers can wait on.
+    """
+
+    def __init__(self):
+        """
+        Initialize an unfinished call.
+        """
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while
+    it runs wait for it and receive its result or its exception.
+    """
+
+    def __init__(self):
+        """
+        Initialize with no calls in flight.
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, fn, timeout=None):
+        """
+        Runs fn once for all concurrent callers with this key.
+
+        Args:
+            key: Identifies identical work
+            fn (callable): Work to run, with no arguments
+            timeout (float, optional): Seconds a waiting caller waits for
+                the in-flight execution
+
+        Returns:
+            The value returned by fn
+
+        Raises:
+            TimeoutError: If the in-flight execution does not finish in time
+            Exception: Whatever fn raised, re-raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError("Timed out waiting for an identical in-flight query")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+# Shared by cache_query and the transactional decorator, so committed
+# writes invalidate the cached reads of the tables they touched
+default_cache = QueryCache()
+
+
+def enable_disk_cache(path='query_cache.db', max_bytes=256 * 1024 * 1024):
+    """
+    Adds a shared on-disk second tier to default_cache.
+
+    Every process that enables it with the same path shares cached
+    results, and they survive restarts. Writes committed through the
+    transactional decorator invalidate both tiers.
+
+    Args:
+        path (str): Path of the SQLite cache file
+        max_bytes (int): Maximum total size of results stored on disk
+
+    Returns:
+        disk_cache.DiskCache: The second tier now in use
+    """
+    from disk_cache import DiskCache
+
+    default_cache.second_tier = DiskCache(path, max_bytes, any_table=ANY_TABLE)
+    return default_cache.second_tier
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for the retry decorator: the circuit breaker counts
+failed calls rather than failed attempts, admits one trial call when
+half-open, and a reconnecting retry never waits on its own pool slot.
+
+Runs against a throwaway users.db in a temporary directory.
+
+Usage:
+    python3 retry_check.py
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from concurrency_check import create_users_db
+
+
+def check_breaker_counts_calls(retry, retry_policy, callers=5):
+    """
+    Concurrent calls that each hit one lock error and then succeed leave
+    the circuit closed.
+    """
+    failed_once = set()
+
+    @retry.retry_on_failure(retries=3, delay=0.01, database='counts-calls')
+    def flaky(caller):
+        if caller not in failed_once:
+            failed_once.add(caller)
+            raise sqlite3.OperationalError("database is locked")
+        return caller
+
+    barrier = threading.Barrier(callers)
+    results = []
+
+    def run(caller):
+        barrier.wait()
+        results.append(flaky(caller))
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(callers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(results) == list(range(callers)), results
+    _, breaker = retry_policy.get_guard('counts-calls')
+    assert breaker.before_call() is False, "circuit opened on retried attempts"
+    print(f"breaker: {callers} calls with one lock error each kept the circuit closed")
+
+
+def check_half_open_trial(retry, retry_policy):
+    """
+    Once the cooldown has passed, exactly one call reaches the database.
+    """
+    _, breaker = retry_policy.get_guard('half-open')
+    breaker.threshold, breaker.cooldown = 1, 0.1
+    release = threading.Event()
+    entered = []
+
+    @retry.retry_on_failure(retries=1, database='half-open')
+    def call(fail=False):
+        entered.append(threading.get_ident())
+        if fail:
+            raise sqlite3.OperationalError("database is locked")
+        release.wait()
+
+    try:
+        call(fail=True)
+    except sqlite3.OperationalError:
+        pass
+    try:
+        call()
+        raise AssertionError("open circuit let a call through")
+    except retry_policy.CircuitOpenError:
+        pass
+    time.sleep(0.15)
+
+    entered.clear()
+    refused = []
+
+    def run():
+        try:
+            call()
+        except retry_policy.CircuitOpenError:
+            refused.append(1)
+
+    workers = [threading.Thread(target=run) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.1)
+    release.set()
+    for worker in workers:
+        worker.join()
+
+    assert len(entered) == 1, f"{len(entered)} trial calls"
+    assert len(refused) == 3
+    assert breaker.before_call() is False, "successful trial did not close the circuit"
+    print("breaker: half-open circuit admitted one trial call and closed")
+
+
+def check_reconnect(retry, db_pool, callers=3):
+    """
+    Callers holding every slot of a pool reconnect without waiting for a
+    second connection.
+    """
+    pool = db_pool.get_pool('users.db')
+    pool.size, pool.timeout = callers, 2
+    barrier = threading.Barrier(callers)
+    results = []
+    errors = []
+
+    @retry.with_db_connection
+    @retry.retry_on_failure(retries=2, delay=0.01, database='reconnect')
+    def count_users(conn, broken):
+        if not broken:
+            # The first attempt loses the connection it was handed
+            barrier.wait()
+            broken.append(conn)
+            conn.close()
+            raise sqlite3.OperationalError("disk I/O error")
+        return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def run():
+        try:
+            results.append(count_users([]))
+        except Exception as e:
+            errors.append(e)
+
+    started = time.monotonic()
+    workers = [threading.Thread(target=run) for _ in range(callers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert not errors, errors
+    assert results == [10] * callers, results
+    assert time.monotonic() - started < pool.timeout, "retry waited for a slot"
+    stats = pool.stats()
+    assert stats['in_use'] == 0 and stats['open'] <= callers, stats
+    print(f"reconnect: {callers} callers holding a {callers}-slot pool "
+          f"replaced their broken connections")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        create_users_db('users.db')
+        # The numbered modules run their examples against users.db on import
+        retry = __import__('3-retry_on_failure')
+        import db_pool
+        import retry_policy
+
+        check_breaker_counts_calls(retry, retry_policy)
+        check_half_open_trial(retry, retry_policy)
+        check_reconnect(retry, db_pool)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
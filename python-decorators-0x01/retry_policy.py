@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Retry policy engine: error classification, jittered backoff, and a
+per-database retry budget and circuit breaker.
+"""
+
+import random
+import sqlite3
+import threading
+import time
+
+
+RETRYABLE_MESSAGES = (
+    'database is locked',
+    'database table is locked',
+    'database is busy',
+    'unable to open database',
+    'disk i/o error',
+)
+
+
+class CircuitOpenError(sqlite3.OperationalError):
+    """
+    Raised without calling the database while its circuit breaker is open.
+    """
+
+
+def is_retryable(error):
+    """
+    Decides whether an error is transient and worth retrying.
+
+    Lock/busy and I/O OperationalErrors are retryable; programming
+    errors, constraint violations and syntax errors are not.
+
+    Args:
+        error (Exception): The error raised by an attempt
+
+    Returns:
+        bool: True if the operation may succeed when retried
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(text in message for text in RETRYABLE_MESSAGES)
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class RetryBudget:
+    """
+    Token bucket that limits retries to a fraction of calls, so a
+    struggling database is not hit with a multiple of its normal load.
+    """
+
+    def __init__(self, ratio=0.2, max_tokens=10.0):
+        """
+        Args:
+            ratio (float): Tokens earned per call; each retry costs one
+            max_tokens (float): Bucket capacity, also the initial balance
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        """
+        Earns tokens for a first attempt.
+        """
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self):
+        """
+        Spends one token for a retry.
+
+        Returns:
+            bool: False if the budget is exhausted
+        """
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive calls fail with a transient error
+    once their retries are used up, and rejects calls for `cooldown`
+    seconds. Then exactly one trial call is let through: its success
+    closes the circuit, its failure opens it again.
+
+    Failures are counted per call, not per attempt, so ordinary lock
+    contention that retries resolve never opens the circuit.
+    """
+
+    def __init__(self, threshold=5, cooldown=10.0):
+        """
+        Args:
+            threshold (int): Consecutive failed calls that open the circuit
+            cooldown (float): Seconds the circuit stays open
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Admits a call, once per call before its first attempt.
+
+        Returns:
+            bool: True if the call is the half-open trial; pass it to end_call
+
+        Raises:
+            CircuitOpenError: While the circuit is open, or while the
+                trial call is still running
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._trial or time.monotonic() - self._opened_at < self.cooldown:
+                raise CircuitOpenError("Circuit open: database is failing, not retrying")
+            self._trial = True
+            return True
+
+    def record_success(self):
+        """
+        Closes the circuit.
+        """
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        """
+        Counts a call that failed transiently after all its retries,
+        opening the circuit at the threshold (or at once after a trial).
+        """
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold or self._trial:
+                self._opened_at = time.monotonic()
+
+    def end_call(self, trial):
+        """
+        Finishes a call admitted by before_call; a trial that recorded no
+        outcome (e.g. it was interrupted) frees the trial slot.
+
+        Args:
+            trial (bool): Value returned by before_call
+        """
+        if trial:
+            with self._lock:
+                self._trial = False
+
+
+class RetryPolicy:
+    """
+    How often and how long to retry: exponential backoff with full jitter,
+    capped per attempt and by an overall deadline.
+    """
+
+    def __init__(self, retries=3, base_delay=0.1, max_delay=5.0, deadline=None,
+                 classify=is_retryable):
+        """
+        Args:
+            retries (int): Total number of attempts
+            base_delay (float): Backoff scale in seconds
+            max_delay (float): Cap on a single backoff in seconds
+            deadline (float, optional): Seconds after which no new attempt starts
+            classify (callable): error -> bool, True if retryable
+        """
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.classify = classify
+
+    def backoff(self, attempt):
+        """
+        Returns a full-jitter delay for the given retry number.
+
+        Args:
+            attempt (int): 0 for the first retry, 1 for the second, ...
+
+        Returns:
+            float: Seconds to sleep, uniform in [0, min(max_delay, base * 2**attempt)]
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def next_delay(self, attempt, error, started, budget):
+        """
+        Decides whether to retry after a failed attempt.
+
+        Args:
+            attempt (int): Index of the attempt that just failed
+            error (Exception): Its error
+            started (float): time.monotonic() when the first attempt began
+            budget (RetryBudget): Shared retry budget
+
+        Returns:
+            float: Seconds to wait before retrying, or None to give up
+        """
+        if attempt + 1 >= self.retries or not self.classify(error):
+            return None
+        delay = self.backoff(attempt)
+        if (self.deadline is not None
+                and time.monotonic() - started + delay >= self.deadline):
+            return None
+        if not budget.try_spend():
+            return None
+        return delay
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(key):
+    """
+    Returns the retry budget and circuit breaker shared by every retried
+    call against one database.
+
+    Args:
+        key (str): Database identifier, typically its path
+
+    Returns:
+        tuple: (RetryBudget, CircuitBreaker)
+    """
+    with _guards_lock:
+        guard = _guards.get(key)
+        if guard is None:
+            guard = _guards[key] = (RetryBudget(), CircuitBreaker())
+        return guard
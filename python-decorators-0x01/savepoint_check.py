@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for savepoint-nested transactions: a failing inner call
+rolls back alone and the outermost call commits once.
+
+Runs against a throwaway users.db in a temporary directory.
+
+Usage:
+    python3 savepoint_check.py
+"""
+
+import os
+import sys
+import tempfile
+
+from concurrency_check import create_users_db, emails
+
+
+def check_savepoints(transactional):
+    """
+    Nested decorated calls are savepoints of the outer transaction.
+    """
+    @transactional.with_db_connection
+    @transactional.transactional
+    def failing_update(conn, user_id):
+        conn.execute("UPDATE users SET email = 'lost' WHERE id = ?", (user_id,))
+        raise ValueError("inner")
+
+    @transactional.with_db_connection
+    @transactional.transactional
+    def outer(conn, fail=False):
+        transactional.update_user_email(user_id=8, new_email='s8')
+        try:
+            failing_update(9)
+        except ValueError:
+            pass
+        transactional.update_user_email(user_id=10, new_email='s10')
+        # Nothing is committed until the outermost call returns
+        assert emails([8, 10]) == ['e8', 'e10']
+        if fail:
+            raise RuntimeError("outer")
+
+    try:
+        outer(fail=True)
+    except RuntimeError:
+        pass
+    assert emails([8, 9, 10]) == ['e8', 'e9', 'e10']
+
+    outer()
+    assert emails([8, 9, 10]) == ['s8', 'e9', 's10']
+    print("savepoints: inner failure rolled back alone, outer committed once")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        create_users_db('users.db')
+        # The numbered modules run their examples against users.db on import
+        transactional = __import__('2-transactional')
+
+        check_savepoints(transactional)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Statement and cursor reuse for pooled sqlite3 connections.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from itertools import islice
+
+
+DEFAULT_CACHE_SIZE = 128
+
+_totals_lock = threading.Lock()
+_totals = {'hits': 0, 'misses': 0}
+
+
+class StatementCachingConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that keeps one cursor per SQL string.
+
+    Repeating a query with execute_cached reuses both the cursor and the
+    compiled statement (sqlite3 keeps its own per-connection statement
+    cache of the same size), so hot queries skip cursor creation and
+    re-parsing. Pass it to sqlite3.connect as factory.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Accepts the sqlite3.connect arguments; cached_statements also
+        sizes the cursor cache.
+        """
+        super().__init__(*args, **kwargs)
+        self.cache_size = kwargs.get('cached_statements', DEFAULT_CACHE_SIZE)
+        self._cursors = OrderedDict()
+        self.statement_hits = 0
+        self.statement_misses = 0
+
+    def execute_cached(self, sql, params=()):
+        """
+        Executes sql on the cursor cached for it.
+
+        The returned cursor is reused by the next execute_cached call with
+        the same SQL on this connection, so fetch its rows first.
+
+        Args:
+            sql (str): SQL statement
+            params (tuple): Parameters for the statement
+
+        Returns:
+            sqlite3.Cursor: The cursor the statement ran on
+        """
+        cursor = self._cursors.get(sql)
+        if cursor is None:
+            self.statement_misses += 1
+            _count('misses')
+            cursor = self.cursor()
+            self._cursors[sql] = cursor
+            if len(self._cursors) > self.cache_size:
+                _, oldest = self._cursors.popitem(last=False)
+                oldest.close()
+        else:
+            self.statement_hits += 1
+            _count('hits')
+            self._cursors.move_to_end(sql)
+        return cursor.execute(sql, params)
+
+    def statement_stats(self):
+        """
+        Returns this connection's statement cache counters.
+
+        Returns:
+            dict: hits, misses, hit_ratio and cached cursors
+        """
+        return _stats(self.statement_hits, self.statement_misses, len(self._cursors))
+
+    def close(self):
+        """
+        Closes the cached cursors and the connection.
+        """
+        for cursor in self._cursors.values():
+            cursor.close()
+        self._cursors.clear()
+        super().close()
+
+
+def _count(name):
+    """
+    Increments a process-wide statement cache counter.
+    """
+    with _totals_lock:
+        _totals[name] += 1
+
+
+def _stats(hits, misses, cached=None):
+    """
+    Builds a counters dict with the hit ratio.
+    """
+    total = hits + misses
+    stats = {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+    if cached is not None:
+        stats['cached'] = cached
+    return stats
+
+
+def statement_stats():
+    """
+    Returns statement cache counters summed over every connection.
+
+    Returns:
+        dict: hits, misses and hit_ratio
+    """
+    with _totals_lock:
+        return _stats(_totals['hits'], _totals['misses'])
+
+
+def executemany_batched(conn, sql, rows, batch_size=500):
+    """
+    Runs a write statement over rows in batches of executemany calls.
+
+    The statement is compiled once and reused for every row, and rows
+    can be any iterable (e.g. a generator) since only one batch is held
+    in memory. Committing is left to the caller, e.g. @transactional.
+
+    Args:
+        conn: sqlite3 connection object
+        sql (str): INSERT/UPDATE/DELETE statement with placeholders
+        rows (iterable): Parameter tuples
+        batch_size (int): Rows per executemany call (default: 500)
+
+    Returns:
+        int: Total number of rows affected
+    """
+    cursor = conn.cursor()
+    affected = 0
+    rows = iter(rows)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            cursor.executemany(sql, batch)
+            affected += max(cursor.rowcount, 0)
+    finally:
+        cursor.close()
+    return affected
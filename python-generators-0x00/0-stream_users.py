@@ -3,48 +3,229 @@
 Generator function to stream rows from user_data table one by one.
 """
 
-import mysql.connector
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from mysql.connector import Error
 
+import db_pool
+
+
+_DONE = object()
 
-def stream_users():
+
+def stream_users(chunk_size=1000):
     """
     Generator function that streams rows from user_data table one by one.
     
+    Rows are read from an unbuffered cursor in chunks of chunk_size, so the
+    result set stays on the server and memory is bounded by one chunk.
+    
+    Args:
+        chunk_size (int): Number of rows pulled per fetchmany call
+    
     Yields:
         dict: Dictionary containing user_id, name, email, and age
     """
     connection = None
     cursor = None
     try:
-        # Connect to the ALX_prodev database
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='ALX_prodev'
-        )
+        # Borrow a connection to the ALX_prodev database from the pool
+        connection = db_pool.get_pool().acquire()
         
         if connection.is_connected():
-            # Create a cursor with dictionary=True to get results as dicts
-            cursor = connection.cursor(dictionary=True)
+            # Unbuffered cursor with dictionary=True to get results as dicts
+            cursor = connection.cursor(dictionary=True, buffered=False)
             
             # Execute the query to fetch all users
             cursor.execute("SELECT user_id, name, email, age FROM user_data")
             
-            # Stream rows one by one using a single loop
+            # Pull rows in chunks but still yield them one by one
             while True:
-                row = cursor.fetchone()
-                if row is None:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
                     break
-                yield row
+                yield from rows
                 
     except Error as e:
         print(f"Error streaming users: {e}")
     finally:
         # Clean up resources
-        if cursor:
-            cursor.close()
-        if connection and connection.is_connected():
-            connection.close()
+        try:
+            if cursor:
+                db_pool.close_cursor(cursor)
+        finally:
+            if connection:
+                db_pool.get_pool().release(connection)
+
+
+def partition_bounds(partitions):
+    """
+    Splits the UUID user_id key space into contiguous ranges.
+    
+    user_id values are lowercase hex UUIDs, so evenly spaced 4-digit hex
+    prefixes give ranges of roughly equal size.
+    
+    Args:
+        partitions (int): Number of ranges
+    
+    Returns:
+        list: (low, high) tuples; low is inclusive, high exclusive and
+            None means unbounded
+    """
+    step = 0x10000 / partitions
+    cuts = [format(int(step * i), '04x') for i in range(1, partitions)]
+    lows = [None] + cuts
+    highs = cuts + [None]
+    return list(zip(lows, highs))
+
+
+def stream_partition(low, high, columns="user_id, name, email, age", chunk_size=1000):
+    """
+    Generator that streams the rows of one user_id range, in user_id order,
+    on its own pooled connection.
+    
+    Args:
+        low (str): Inclusive lower bound, or None
+        high (str): Exclusive upper bound, or None
+        columns (str): Columns to select
+        chunk_size (int): Number of rows pulled per fetchmany call
+    
+    Yields:
+        list: Chunks of dictionaries containing user data
+    """
+    conditions = []
+    params = []
+    if low is not None:
+        conditions.append("user_id >= %s")
+        params.append(low)
+    if high is not None:
+        conditions.append("user_id < %s")
+        params.append(high)
+    where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    with db_pool.get_pool().connection() as connection:
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(
+                f"SELECT {columns} FROM user_data{where_clause} ORDER BY user_id",
+                tuple(params)
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            db_pool.close_cursor(cursor)
 
+
+def stream_users_partitioned(partitions=4, ordered=False, chunk_size=1000, depth=4):
+    """
+    Generator that scans user_data in parallel over user_id ranges and
+    merges the results into one stream of rows.
+    
+    Each range is read by its own thread on its own pooled connection.
+    Unordered mode yields rows as soon as any range produces them; ordered
+    mode yields ranges one after another, so rows come out in user_id order
+    while later ranges are already being read ahead. If any range fails,
+    the other readers are stopped and the error is raised in the consumer,
+    so a stream never ends quietly with a range missing.
+    
+    Args:
+        partitions (int): Number of ranges scanned in parallel
+        ordered (bool): Preserve user_id order across ranges
+        chunk_size (int): Number of rows pulled per fetchmany call
+        depth (int): Chunks buffered per queue before a reader blocks
+    
+    Yields:
+        dict: Dictionary containing user_id, name, email, and age
+    
+    Raises:
+        mysql.connector.Error: If reading one of the ranges fails
+    """
+    bounds = partition_bounds(partitions)
+    stop = threading.Event()
+    if ordered:
+        queues = [queue.Queue(maxsize=depth) for _ in bounds]
+    else:
+        shared = queue.Queue(maxsize=depth * partitions)
+        queues = [shared] * partitions
+    
+    def put(target, item):
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def reader(index):
+        target = queues[index]
+        low, high = bounds[index]
+        chunks = stream_partition(low, high, chunk_size=chunk_size)
+        try:
+            for chunk in chunks:
+                if not put(target, chunk):
+                    break
+        except Exception as e:
+            put(target, e)
+        finally:
+            chunks.close()
+            put(target, _DONE)
+    
+    executor = ThreadPoolExecutor(max_workers=partitions)
+    for index in range(partitions):
+        executor.submit(reader, index)
+    
+    try:
+        if ordered:
+            sources = [(q, 1) for q in queues]
+        else:
+            sources = [(shared, partitions)]
+        for source, producers in sources:
+            remaining = producers
+            while remaining:
+                item = source.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                yield from item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+
+
+def map_partitions(map_fn, reduce_fn, partitions=4,
+                   columns="user_id, name, email, age", chunk_size=1000):
+    """
+    Runs map_fn over every user_id range in parallel and combines the
+    partial results with reduce_fn.
+    
+    Args:
+        map_fn (callable): Takes an iterator of row dicts for one range
+            and returns a partial result
+        reduce_fn (callable): Takes the list of partial results
+        partitions (int): Number of ranges scanned in parallel
+        columns (str): Columns to select
+        chunk_size (int): Number of rows pulled per fetchmany call
+    
+    Returns:
+        The value returned by reduce_fn
+    """
+    def run(bound):
+        low, high = bound
+        rows = (
+            row
+            for chunk in stream_partition(low, high, columns, chunk_size)
+            for row in chunk
+        )
+        return map_fn(rows)
+    
+    with ThreadPoolExecutor(max_workers=partitions) as executor:
+        partials = list(executor.map(run, partition_bounds(partitions)))
+    return reduce_fn(partials)
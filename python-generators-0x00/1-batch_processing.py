@@ -3,39 +3,193 @@
 Batch processing functions to fetch and process users in batches.
 """
 
-import mysql.connector
 from mysql.connector import Error
 
+import db_pool
 
-def stream_users_in_batches(batch_size):
+
+COLUMNS = ('user_id', 'name', 'email', 'age')
+OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'LIKE', 'IN')
+
+
+def to_columns(rows):
+    """
+    Converts a batch of (user_id, name, email, age) tuples to NumPy columns.
+    
+    Text columns are fixed-width byte strings ('S' dtype, one byte per
+    ASCII character): user_id as ASCII, name and email UTF-8 encoded, so
+    decode them with .astype(str) or bytes.decode('utf-8') when needed.
+    
+    Args:
+        rows (list): Tuples in COLUMNS order
+    
+    Returns:
+        dict: Column name -> NumPy array (bytes for text columns,
+            float64 for age)
+    """
+    import numpy as np
+    
+    user_ids, names, emails, ages = zip(*rows)
+    return {
+        'user_id': np.array([user_id.encode('ascii') for user_id in user_ids], dtype='S36'),
+        'name': np.array([name.encode('utf-8') for name in names], dtype=bytes),
+        'email': np.array([email.encode('utf-8') for email in emails], dtype=bytes),
+        'age': np.array(ages, dtype=np.float64),
+    }
+
+
+def read_user_batches(batch_size, columnar=False):
+    """
+    Generator function that fetches rows from user_data table in batches,
+    raising on database errors.
+    
+    Unlike stream_users_in_batches, a failure partway through raises
+    instead of ending the stream, so callers can tell a complete read
+    from a partial one.
+    
+    Args:
+        batch_size (int): Number of rows to fetch per batch
+        columnar (bool): Yield each batch as a dict of NumPy arrays
+            (see to_columns) instead of a list of dicts. Requires numpy.
+    
+    Yields:
+        list: List of dictionaries containing user data for each batch,
+            or a dict of column arrays when columnar is True
+    
+    Raises:
+        mysql.connector.Error: If the query or a fetch fails
+    """
+    connection = None
+    cursor = None
+    try:
+        # Borrow a connection to the ALX_prodev database from the pool
+        connection = db_pool.get_pool().acquire()
+        
+        # Dicts per row, or plain tuples when building columns
+        cursor = connection.cursor(dictionary=not columnar)
+        
+        # Execute the query to fetch all users
+        cursor.execute("SELECT user_id, name, email, age FROM user_data")
+        
+        # Fetch rows in batches using a single loop
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield to_columns(batch) if columnar else batch
+    finally:
+        # Clean up resources
+        try:
+            if cursor:
+                db_pool.close_cursor(cursor)
+        finally:
+            if connection:
+                db_pool.get_pool().release(connection)
+
+
+def stream_users_in_batches(batch_size, columnar=False):
     """
     Generator function that fetches rows from user_data table in batches.
     
+    Database errors are printed and end the stream; use read_user_batches
+    to have them raised.
+    
     Args:
         batch_size (int): Number of rows to fetch per batch
+        columnar (bool): Yield each batch as a dict of NumPy arrays
+            (see to_columns) instead of a list of dicts. Requires numpy.
+    
+    Yields:
+        list: List of dictionaries containing user data for each batch,
+            or a dict of column arrays when columnar is True
+    """
+    try:
+        yield from read_user_batches(batch_size, columnar)
+    except Error as e:
+        print(f"Error streaming users in batches: {e}")
+    return
+
+
+def compile_predicate(predicate):
+    """
+    Compiles (column, operator, value) conditions into a parameterized WHERE clause.
+    
+    Args:
+        predicate: A (column, operator, value) tuple or a list of them,
+            combined with AND. Columns and operators are checked against
+            COLUMNS and OPERATORS; values are always bound as parameters.
+    
+    Returns:
+        tuple: (where_clause, params)
+    
+    Raises:
+        ValueError: If a column or operator is not allowed
+    """
+    if isinstance(predicate, tuple):
+        predicate = [predicate]
+    
+    clauses = []
+    params = []
+    for column, operator, value in predicate:
+        operator = operator.upper()
+        if column not in COLUMNS:
+            raise ValueError(f"Unsupported column: {column}")
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {operator}")
+        if operator == 'IN':
+            values = list(value)
+            if not values:
+                # An empty IN list matches nothing
+                clauses.append("1 = 0")
+                continue
+            placeholders = ", ".join(["%s"] * len(values))
+            clauses.append(f"{column} IN ({placeholders})")
+            params.extend(values)
+        else:
+            clauses.append(f"{column} {operator} %s")
+            params.append(value)
+    
+    where_clause = " AND ".join(clauses)
+    return (f" WHERE {where_clause}" if where_clause else ""), tuple(params)
+
+
+def stream_filtered_users_in_batches(batch_size, predicate):
+    """
+    Generator function that fetches only the rows matching predicate in batches.
+    
+    Condition tuples are pushed down into the SQL WHERE clause so only
+    matching rows cross the network; an arbitrary callable is applied to
+    each row in Python instead.
+    
+    Args:
+        batch_size (int): Number of rows to fetch per batch
+        predicate: (column, operator, value) tuple, list of tuples,
+            or a callable taking a user dict and returning bool
     
     Yields:
         list: List of dictionaries containing user data for each batch
     """
+    if callable(predicate):
+        for batch in stream_users_in_batches(batch_size):
+            filtered = [user for user in batch if predicate(user)]
+            if filtered:
+                yield filtered
+        return
+    
+    where_clause, params = compile_predicate(predicate)
     connection = None
     cursor = None
     try:
-        # Connect to the ALX_prodev database
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='ALX_prodev'
-        )
+        # Borrow a connection to the ALX_prodev database from the pool
+        connection = db_pool.get_pool().acquire()
         
         if connection.is_connected():
-            # Create a cursor with dictionary=True to get results as dicts
             cursor = connection.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT user_id, name, email, age FROM user_data{where_clause}",
+                params
+            )
             
-            # Execute the query to fetch all users
-            cursor.execute("SELECT user_id, name, email, age FROM user_data")
-            
-            # Fetch rows in batches using a single loop
             while True:
                 batch = cursor.fetchmany(batch_size)
                 if not batch:
@@ -43,14 +197,14 @@ def stream_users_in_batches(batch_size):
                 yield batch
                 
     except Error as e:
-        print(f"Error streaming users in batches: {e}")
+        print(f"Error streaming filtered users in batches: {e}")
     finally:
-        # Clean up resources
-        if cursor:
-            cursor.close()
-        if connection and connection.is_connected():
-            connection.close()
-    return
+        try:
+            if cursor:
+                db_pool.close_cursor(cursor)
+        finally:
+            if connection:
+                db_pool.get_pool().release(connection)
 
 
 def batch_processing(batch_size):
@@ -60,12 +214,25 @@ def batch_processing(batch_size):
     Args:
         batch_size (int): Number of rows to fetch per batch
     """
-    # Loop through batches (Loop 1)
-    for batch in stream_users_in_batches(batch_size):
-        # Filter and print users over age 25 (Loop 2)
+    # Loop through batches already filtered by MySQL (Loop 1)
+    for batch in stream_filtered_users_in_batches(batch_size, ('age', '>', 25)):
+        # Print users over age 25 (Loop 2)
         for user in batch:
-            # Convert age to float for comparison (age is DECIMAL in DB)
-            age = float(user['age'])
-            if age > 25:
-                print(user)
+            print(user)
 
+
+def batch_processing_columnar(batch_size):
+    """
+    Processes columnar batches of users and selects those over age 25
+    with a vectorized mask instead of a per-row loop.
+    
+    Args:
+        batch_size (int): Number of rows to fetch per batch
+    
+    Yields:
+        dict: Column arrays containing only users over age 25
+    """
+    for batch in stream_users_in_batches(batch_size, columnar=True):
+        mask = batch['age'] > 25
+        if mask.any():
+            yield {column: values[mask] for column, values in batch.items()}
@@ -3,7 +3,13 @@
 Lazy pagination generator to fetch users in pages from the database.
 """
 
-import seed
+import queue
+import threading
+
+import db_pool
+
+
+_DONE = object()
 
 
 def paginate_users(page_size, offset):
@@ -17,11 +23,14 @@ def paginate_users(page_size, offset):
     Returns:
         list: List of dictionaries containing user data
     """
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    connection.close()
+    with db_pool.get_pool().connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT user_id, name, email, age FROM user_data LIMIT %s OFFSET %s",
+            (page_size, offset)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
     return rows
 
 
@@ -51,3 +60,144 @@ def lazy_pagination(page_size):
         # Move to next page
         offset += page_size
 
+
+def prefetch_pages(pages, depth=1):
+    """
+    Generator that reads pages ahead on a background thread.
+    
+    Up to depth pages are fetched while the consumer works on the current
+    one. If the consumer stops iterating early, the background thread is
+    told to stop and the source generator is closed on that thread.
+    
+    Args:
+        pages: Iterator of pages, e.g. lazy_pagination(page_size)
+        depth (int): Maximum number of pages buffered ahead (default: 1)
+    
+    Yields:
+        list: Pages from the source, in order
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    
+    def put(item):
+        # Block while the buffer is full, but give up once asked to stop
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def producer():
+        try:
+            for page in pages:
+                if not put(page):
+                    break
+        except Exception as e:
+            put(e)
+        finally:
+            if hasattr(pages, 'close'):
+                pages.close()
+            put(_DONE)
+    
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def lazy_pagination_prefetched(page_size, depth=1):
+    """
+    Generator function like lazy_pagination that fetches the next page
+    on a background thread while the current page is being processed.
+    
+    Args:
+        page_size (int): Number of users to fetch per page
+        depth (int): Maximum number of pages fetched ahead (default: 1)
+    
+    Yields:
+        list: List of dictionaries containing user data for each page
+    """
+    yield from prefetch_pages(lazy_pagination(page_size), depth)
+
+
+def paginate_users_after(connection, page_size, last_user_id=None):
+    """
+    Fetches the page of users that follows last_user_id (keyset pagination).
+    
+    Unlike OFFSET, the primary key index lets MySQL seek straight to the
+    start of the page, so deep pages cost the same as the first one.
+    
+    Args:
+        connection: Open MySQL connection object
+        page_size (int): Number of users to fetch per page
+        last_user_id (str, optional): user_id of the last row already seen
+    
+    Returns:
+        list: List of dictionaries containing user data
+    """
+    cursor = connection.cursor(dictionary=True)
+    if last_user_id is None:
+        cursor.execute(
+            "SELECT user_id, name, email, age FROM user_data "
+            "ORDER BY user_id LIMIT %s",
+            (page_size,)
+        )
+    else:
+        cursor.execute(
+            "SELECT user_id, name, email, age FROM user_data "
+            "WHERE user_id > %s ORDER BY user_id LIMIT %s",
+            (last_user_id, page_size)
+        )
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def cursor_token(page):
+    """
+    Returns the resume token for a page: the user_id of its last row.
+    
+    Args:
+        page (list): Page yielded by lazy_keyset_pagination
+    
+    Returns:
+        str: Token to pass as start_after to resume after this page
+    """
+    return page[-1]['user_id'] if page else None
+
+
+def lazy_keyset_pagination(page_size, start_after=None):
+    """
+    Generator function that lazily fetches pages ordered by user_id,
+    holding one pooled connection for the whole scan.
+    
+    Args:
+        page_size (int): Number of users to fetch per page
+        start_after (str, optional): Token from cursor_token() to resume a scan
+    
+    Yields:
+        list: List of dictionaries containing user data for each page
+    """
+    last_user_id = start_after
+    with db_pool.get_pool().connection() as connection:
+        while True:
+            page = paginate_users_after(connection, page_size, last_user_id)
+            
+            if not page:
+                break
+            
+            yield page
+            
+            # Resume from the last key instead of skipping rows
+            last_user_id = cursor_token(page)
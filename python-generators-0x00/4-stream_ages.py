@@ -3,50 +3,59 @@
 Memory-efficient average age calculation using generators.
 """
 
-import mysql.connector
+import math
+
 from mysql.connector import Error
 
+import db_pool
+
+stream_users_module = __import__('0-stream_users')
+
 
-def stream_user_ages():
+def stream_user_ages(chunk_size=1000):
     """
     Generator function that yields user ages one by one from the database.
     
+    Ages are read from an unbuffered cursor in chunks of chunk_size, so
+    memory is bounded by one chunk regardless of table size.
+    
+    Args:
+        chunk_size (int): Number of rows pulled per fetchmany call
+    
     Yields:
         float: Age of each user
     """
     connection = None
     cursor = None
     try:
-        # Connect to the ALX_prodev database
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='ALX_prodev'
-        )
+        # Borrow a connection to the ALX_prodev database from the pool
+        connection = db_pool.get_pool().acquire()
         
         if connection.is_connected():
-            cursor = connection.cursor()
+            cursor = connection.cursor(buffered=False)
             
             # Execute query to fetch only ages (more memory efficient)
             cursor.execute("SELECT age FROM user_data")
             
-            # Stream ages one by one using a single loop
+            # Pull ages in chunks but still yield them one by one
             while True:
-                row = cursor.fetchone()
-                if row is None:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
                     break
                 # Convert DECIMAL to float and yield
-                yield float(row[0])
+                for row in rows:
+                    yield float(row[0])
                 
     except Error as e:
         print(f"Error streaming user ages: {e}")
     finally:
         # Clean up resources
-        if cursor:
-            cursor.close()
-        if connection and connection.is_connected():
-            connection.close()
+        try:
+            if cursor:
+                db_pool.close_cursor(cursor)
+        finally:
+            if connection:
+                db_pool.get_pool().release(connection)
 
 
 def calculate_average_age():
@@ -70,6 +79,245 @@ def calculate_average_age():
         print("Average age of users: 0")
 
 
+def _fetch_all(query, params=None):
+    """
+    Runs a small aggregate query on the ALX_prodev database.
+    
+    Args:
+        query (str): SQL query to execute
+        params (tuple, optional): Parameters for the query
+    
+    Returns:
+        list: Rows returned by the query, or an empty list on error
+    """
+    connection = None
+    cursor = None
+    try:
+        # Borrow a connection to the ALX_prodev database from the pool
+        connection = db_pool.get_pool().acquire()
+        cursor = connection.cursor()
+        cursor.execute(query, params or ())
+        return cursor.fetchall()
+    except Error as e:
+        print(f"Error aggregating user ages: {e}")
+        return []
+    finally:
+        try:
+            if cursor:
+                db_pool.close_cursor(cursor)
+        finally:
+            if connection:
+                db_pool.get_pool().release(connection)
+
+
+class RunningStats:
+    """
+    Streaming accumulator for count, mean, variance, min, max and an
+    age-bucket histogram using Welford's numerically stable update.
+    """
+    
+    def __init__(self, bucket_size=10):
+        """
+        Initialize an empty accumulator.
+        
+        Args:
+            bucket_size (int): Width of the histogram buckets in years
+        """
+        self.bucket_size = bucket_size
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = {}
+    
+    def add(self, value):
+        """
+        Add one value to the accumulator.
+        
+        Args:
+            value (float): Age to add
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        bucket = int(value // self.bucket_size) * self.bucket_size
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+    
+    @property
+    def variance(self):
+        """
+        Population variance of the values seen so far.
+        """
+        return self._m2 / self.count if self.count else 0.0
+    
+    def as_dict(self):
+        """
+        Returns:
+            dict: count, mean, stddev, min, max and histogram
+        """
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count else 0.0,
+            'stddev': math.sqrt(self.variance),
+            'min': self.min,
+            'max': self.max,
+            'histogram': dict(sorted(self.histogram.items())),
+        }
+
+
+def _age_groups():
+    """
+    Returns one (age, count) pair per distinct age, in age order.
+    
+    MySQL groups the rows in a single pass, so only one row per distinct
+    age crosses the wire, and every statistic derived from the groups
+    comes from the same snapshot.
+    """
+    groups = _fetch_all("SELECT age, COUNT(*) FROM user_data GROUP BY age ORDER BY age")
+    return [(float(age), n) for age, n in groups]
+
+
+def _check_percentiles(percentiles):
+    """
+    Returns percentiles as a list.
+    
+    Raises:
+        ValueError: If a percentile is outside 0 to 100
+    """
+    percentiles = list(percentiles)
+    for p in percentiles:
+        if not 0 <= p <= 100:
+            raise ValueError(f"Percentile must be between 0 and 100: {p}")
+    return percentiles
+
+
+def _percentiles(groups, percentiles):
+    """
+    Walks the cumulative counts of groups once for nearest-rank percentiles.
+    """
+    count = sum(n for _, n in groups)
+    if count == 0:
+        return {p: None for p in percentiles}
+    
+    result = {}
+    # Visit percentiles in rank order while walking the groups once
+    ranks = sorted((max(math.ceil(p / 100 * count), 1), p) for p in percentiles)
+    groups = iter(groups)
+    seen = 0
+    age = None
+    for rank, p in ranks:
+        while seen < rank:
+            age, n = next(groups)
+            seen += n
+        result[p] = age
+    return result
+
+
+def age_percentiles(percentiles=(50, 90, 99)):
+    """
+    Computes exact nearest-rank age percentiles from one grouped query.
+    
+    MySQL returns one (age, count) row per distinct age in a single pass;
+    the cumulative counts are walked here, so every percentile and the
+    total come from the same snapshot.
+    
+    Args:
+        percentiles (iterable): Percentiles between 0 and 100
+    
+    Returns:
+        dict: Mapping of percentile to age (None when there are no users)
+    
+    Raises:
+        ValueError: If a percentile is outside 0 to 100
+    """
+    percentiles = _check_percentiles(percentiles)
+    return _percentiles(_age_groups(), percentiles)
+
+
+def aggregate_ages(predicate=None, bucket_size=10, percentiles=(50, 90, 99)):
+    """
+    Computes age statistics, pushing the work into SQL when possible.
+    
+    Without a predicate, MySQL groups the ages in one query and count,
+    mean, stddev, min, max, the histogram and the percentiles are all
+    derived from those (age, count) rows, so they describe one snapshot
+    of the table. With a Python predicate the ages are streamed through
+    stream_user_ages into a RunningStats accumulator instead (percentiles
+    are not available in that mode).
+    
+    Args:
+        predicate (callable, optional): Function age -> bool selecting rows
+        bucket_size (int): Width of the histogram buckets in years
+        percentiles (iterable): Percentiles to compute in SQL mode
+    
+    Returns:
+        dict: count, mean, stddev, min, max, histogram and percentiles
+    
+    Raises:
+        ValueError: If a percentile is outside 0 to 100
+    """
+    if predicate is not None:
+        stats = RunningStats(bucket_size)
+        for age in stream_user_ages():
+            if predicate(age):
+                stats.add(age)
+        result = stats.as_dict()
+        result['percentiles'] = {}
+        return result
+    
+    percentiles = _check_percentiles(percentiles)
+    groups = _age_groups()
+    count = sum(n for _, n in groups)
+    mean = sum(age * n for age, n in groups) / count if count else 0.0
+    variance = sum(n * (age - mean) ** 2 for age, n in groups) / count if count else 0.0
+    histogram = {}
+    for age, n in groups:
+        bucket = int(age // bucket_size) * bucket_size
+        histogram[bucket] = histogram.get(bucket, 0) + n
+    return {
+        'count': count,
+        'mean': mean,
+        'stddev': math.sqrt(variance),
+        'min': groups[0][0] if groups else None,
+        'max': groups[-1][0] if groups else None,
+        'histogram': histogram,
+        'percentiles': _percentiles(groups, percentiles),
+    }
+
+
+def calculate_average_age_partitioned(partitions=4):
+    """
+    Calculates the average age as a map/reduce over user_id ranges
+    scanned in parallel, each on its own pooled connection.
+    
+    Args:
+        partitions (int): Number of ranges scanned in parallel
+    
+    Returns:
+        float: Average age of users, or 0 if there are none
+    """
+    def partial_sum(rows):
+        total_age = 0
+        count = 0
+        for row in rows:
+            total_age += float(row['age'])
+            count += 1
+        return total_age, count
+    
+    def combine(partials):
+        total_age = sum(total for total, _ in partials)
+        count = sum(n for _, n in partials)
+        return total_age / count if count else 0
+    
+    return stream_users_module.map_partitions(
+        partial_sum, combine, partitions, columns="user_id, age"
+    )
+
+
 if __name__ == "__main__":
     calculate_average_age()
 
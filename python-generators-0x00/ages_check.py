@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for the pushed-down age aggregates: they agree with the
+streamed ages, and percentiles outside 0 to 100 are rejected.
+
+Runs against mysql_fake, an SQLite-backed stand-in for mysql.connector,
+in a temporary directory.
+
+Usage:
+    python3 ages_check.py
+"""
+
+import math
+import os
+import sys
+import tempfile
+
+import mysql_fake
+
+
+def check_aggregates(stream_ages):
+    """
+    The grouped query gives the same statistics as streaming every age.
+    """
+    ages = sorted(float(age) for age in stream_ages.stream_user_ages())
+    expected = stream_ages.RunningStats()
+    for age in ages:
+        expected.add(age)
+    expected = expected.as_dict()
+
+    result = stream_ages.aggregate_ages(percentiles=(0, 50, 90, 100))
+    for name in ('count', 'min', 'max', 'histogram'):
+        assert result[name] == expected[name], (name, result[name], expected[name])
+    for name in ('mean', 'stddev'):
+        assert math.isclose(result[name], expected[name]), (name, result[name])
+    assert result['percentiles'] == {0: ages[0], 50: ages[49], 90: ages[89], 100: ages[99]}
+    assert stream_ages.age_percentiles((50,)) == {50: ages[49]}
+    print("aggregates: one grouped query matched the streamed statistics")
+
+
+def check_percentile_range(stream_ages):
+    """
+    Percentiles outside 0 to 100 raise ValueError.
+    """
+    for bad in (-1, 101, 150):
+        for call in (stream_ages.age_percentiles, stream_ages.aggregate_ages):
+            try:
+                call(percentiles=(50, bad))
+                raise AssertionError(f"percentile {bad} was accepted")
+            except ValueError:
+                pass
+    print("aggregates: out-of-range percentiles rejected")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        mysql_fake.create_users('users.sqlite')
+        mysql_fake.install('users.sqlite')
+        stream_ages = __import__('4-stream_ages')
+
+        check_aggregates(stream_ages)
+        check_percentile_range(stream_ages)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
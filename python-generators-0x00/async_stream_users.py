@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Async generator counterparts of the user streaming functions.
+
+Backed by aiomysql against MySQL, or by aiosqlite when a sqlite_path is
+given (a local stand-in with the same user_data schema).
+"""
+
+import asyncio
+from contextlib import aclosing, asynccontextmanager
+
+
+class _AsyncSource:
+    """
+    Thin wrapper over an open aiomysql or aiosqlite connection that runs
+    a query and yields its rows as lists of dicts.
+    """
+
+    def __init__(self, connection, is_sqlite):
+        """
+        Args:
+            connection: Open aiomysql or aiosqlite connection
+            is_sqlite (bool): True for aiosqlite ('?' placeholders)
+        """
+        self.connection = connection
+        self.is_sqlite = is_sqlite
+
+    async def batches(self, query, params=(), batch_size=1000):
+        """
+        Async generator that runs query and yields rows in batches.
+
+        Args:
+            query (str): SQL query using %s placeholders
+            params (tuple): Parameters for the query
+            batch_size (int): Number of rows per batch
+
+        Yields:
+            list: List of dictionaries keyed by column name
+        """
+        if self.is_sqlite:
+            cursor = await self.connection.execute(query.replace('%s', '?'), params)
+        else:
+            import aiomysql
+            # Server-side cursor so the result set is not buffered client side
+            cursor = await self.connection.cursor(aiomysql.SSCursor)
+            await cursor.execute(query, params)
+        try:
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dict(zip(columns, row)) for row in rows]
+        finally:
+            await cursor.close()
+
+
+@asynccontextmanager
+async def _open(sqlite_path=None):
+    """
+    Opens an async connection to ALX_prodev (or the SQLite stand-in).
+
+    Args:
+        sqlite_path (str, optional): Path of a SQLite database to use instead
+
+    Yields:
+        _AsyncSource: Source bound to the open connection
+    """
+    if sqlite_path:
+        import aiosqlite
+        async with aiosqlite.connect(sqlite_path) as connection:
+            yield _AsyncSource(connection, is_sqlite=True)
+        return
+
+    import aiomysql
+    import db_pool
+    config = db_pool.get_config()
+    connection = await aiomysql.connect(
+        host=config['host'],
+        port=config['port'],
+        user=config['user'],
+        password=config['password'],
+        db=config.get('database')
+    )
+    try:
+        yield _AsyncSource(connection, is_sqlite=False)
+    finally:
+        connection.close()
+
+
+async def prefetch(source):
+    """
+    Wraps an async iterator so its next item is fetched in the background
+    while the consumer processes the current one.
+
+    Args:
+        source: Async generator to read ahead from
+
+    Yields:
+        Items of source, in order
+    """
+    pending = asyncio.ensure_future(source.__anext__())
+    try:
+        while True:
+            try:
+                item = await pending
+            except StopAsyncIteration:
+                break
+            pending = asyncio.ensure_future(source.__anext__())
+            yield item
+    finally:
+        # Let an in-flight read-ahead settle before closing the source,
+        # so the connection is never closed under a running fetch
+        try:
+            await pending
+        except Exception:
+            pass
+        await source.aclose()
+
+
+async def async_stream_users_in_batches(batch_size, sqlite_path=None):
+    """
+    Async generator that fetches rows from user_data table in batches,
+    reading the next batch ahead while the current one is processed.
+
+    Args:
+        batch_size (int): Number of rows to fetch per batch
+        sqlite_path (str, optional): Use this SQLite database instead of MySQL
+
+    Yields:
+        list: List of dictionaries containing user data for each batch
+    """
+    async with _open(sqlite_path) as source:
+        batches = source.batches(
+            "SELECT user_id, name, email, age FROM user_data", (), batch_size
+        )
+        # Close the read-ahead before the connection, even on early exit
+        async with aclosing(prefetch(batches)) as stream:
+            async for batch in stream:
+                yield batch
+
+
+async def async_stream_users(batch_size=1000, sqlite_path=None):
+    """
+    Async generator that streams rows from user_data table one by one.
+
+    Args:
+        batch_size (int): Number of rows read ahead per fetch
+        sqlite_path (str, optional): Use this SQLite database instead of MySQL
+
+    Yields:
+        dict: Dictionary containing user_id, name, email, and age
+    """
+    async with aclosing(async_stream_users_in_batches(batch_size, sqlite_path)) as batches:
+        async for batch in batches:
+            for row in batch:
+                yield row
+
+
+async def async_stream_user_ages(batch_size=1000, sqlite_path=None):
+    """
+    Async generator that yields user ages one by one.
+
+    Args:
+        batch_size (int): Number of rows read ahead per fetch
+        sqlite_path (str, optional): Use this SQLite database instead of MySQL
+
+    Yields:
+        float: Age of each user
+    """
+    async with _open(sqlite_path) as source:
+        batches = source.batches("SELECT age FROM user_data", (), batch_size)
+        async with aclosing(prefetch(batches)) as stream:
+            async for batch in stream:
+                for row in batch:
+                    yield float(row['age'])
+
+
+async def async_lazy_pagination(page_size, sqlite_path=None):
+    """
+    Async generator that lazily fetches pages ordered by user_id over one
+    connection, prefetching the next page while the current one is used.
+
+    Args:
+        page_size (int): Number of users to fetch per page
+        sqlite_path (str, optional): Use this SQLite database instead of MySQL
+
+    Yields:
+        list: List of dictionaries containing user data for each page
+    """
+    async with _open(sqlite_path) as source:
+
+        async def pages():
+            last_user_id = None
+            while True:
+                if last_user_id is None:
+                    query = ("SELECT user_id, name, email, age FROM user_data "
+                             "ORDER BY user_id LIMIT %s")
+                    params = (page_size,)
+                else:
+                    query = ("SELECT user_id, name, email, age FROM user_data "
+                             "WHERE user_id > %s ORDER BY user_id LIMIT %s")
+                    params = (last_user_id, page_size)
+                page = []
+                async with aclosing(source.batches(query, params, page_size)) as batches:
+                    async for batch in batches:
+                        page.extend(batch)
+                if not page:
+                    return
+                last_user_id = page[-1]['user_id']
+                yield page
+
+        async with aclosing(prefetch(pages())) as stream:
+            async for page in stream:
+                yield page
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the user_data streaming strategies.
+
+Seeds a synthetic user_data table, runs each strategy with several
+batch/page sizes and prints (or writes) a JSON report with throughput,
+latency to first row and peak Python memory (measured in a separate,
+traced run of each strategy).
+
+Usage:
+    python3 benchmark.py --seed --rows 100000 --sizes 100,1000,5000 --output report.json
+    python3 benchmark.py --backend sqlite --rows 100000
+
+--seed drops and recreates user_data, so point MYSQL_DATABASE at a
+scratch database before using it against MySQL.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+
+def generate_users(rows, seed_value=0):
+    """
+    Generator that yields synthetic (user_id, name, email, age) tuples.
+
+    Args:
+        rows (int): Number of users to generate
+        seed_value (int): Random seed so runs are reproducible
+
+    Yields:
+        tuple: (user_id, name, email, age)
+    """
+    rng = random.Random(seed_value)
+    for i in range(rows):
+        user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        yield (user_id, f"User {i}", f"user{i}@example.com", rng.randint(1, 120))
+
+
+def seed_mysql(rows, batch_size=5000):
+    """
+    Recreates user_data in MySQL with synthetic rows using seed.insert_data.
+
+    Args:
+        rows (int): Number of users to insert
+        batch_size (int): Rows per INSERT statement
+    """
+    import seed
+
+    connection = seed.connect_db()
+    seed.create_database(connection)
+    connection.close()
+
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute("DROP TABLE IF EXISTS user_data")
+    cursor.close()
+    seed.create_table(connection)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False,
+                                     newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['user_id', 'name', 'email', 'age'])
+        writer.writerows(generate_users(rows))
+        csv_path = file.name
+    try:
+        seed.insert_data(connection, csv_path, batch_size)
+    finally:
+        os.remove(csv_path)
+        connection.close()
+
+
+def seed_sqlite(path, rows):
+    """
+    Recreates user_data in a SQLite stand-in with synthetic rows.
+
+    Args:
+        path (str): Path of the SQLite database file
+        rows (int): Number of users to insert
+    """
+    connection = sqlite3.connect(path)
+    connection.execute("DROP TABLE IF EXISTS user_data")
+    connection.execute("""
+        CREATE TABLE user_data (
+            user_id VARCHAR(36) NOT NULL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age DECIMAL(10, 2) NOT NULL
+        )
+    """)
+    connection.executemany(
+        "INSERT INTO user_data VALUES (?, ?, ?, ?)", generate_users(rows)
+    )
+    connection.commit()
+    connection.close()
+
+
+def mysql_strategies(sizes):
+    """
+    Builds the strategies backed by the real generator modules.
+
+    Args:
+        sizes (list): Batch/page sizes to try
+
+    Returns:
+        list: (name, size, factory) tuples; factory returns an iterator
+            and each item counts as len(item) rows if it is a list
+    """
+    stream_users = __import__('0-stream_users').stream_users
+    batches = __import__('1-batch_processing').stream_users_in_batches
+    pagination = __import__('2-lazy_paginate')
+    ages = __import__('4-stream_ages').stream_user_ages
+
+    strategies = []
+    for size in sizes:
+        strategies += [
+            ('stream_users', size, lambda s=size: stream_users(chunk_size=s)),
+            ('stream_users_in_batches', size, lambda s=size: batches(s)),
+            ('lazy_pagination', size, lambda s=size: pagination.lazy_pagination(s)),
+            ('lazy_keyset_pagination', size,
+             lambda s=size: pagination.lazy_keyset_pagination(s)),
+            ('stream_user_ages', size, lambda s=size: ages(chunk_size=s)),
+        ]
+    return strategies
+
+
+def sqlite_strategies(path, sizes):
+    """
+    Builds strategies that reproduce the same access patterns on SQLite.
+
+    Args:
+        path (str): Path of the SQLite database file
+        sizes (list): Batch/page sizes to try
+
+    Returns:
+        list: (name, size, factory) tuples, as for mysql_strategies
+    """
+    def fetchone_rows():
+        connection = sqlite3.connect(path)
+        cursor = connection.execute("SELECT user_id, name, email, age FROM user_data")
+        while True:
+            row = cursor.fetchone()
+            if row is None:
+                break
+            yield row
+        connection.close()
+
+    def fetchmany_batches(size):
+        connection = sqlite3.connect(path)
+        cursor = connection.execute("SELECT user_id, name, email, age FROM user_data")
+        while True:
+            batch = cursor.fetchmany(size)
+            if not batch:
+                break
+            yield batch
+        connection.close()
+
+    def offset_pages(size):
+        offset = 0
+        while True:
+            connection = sqlite3.connect(path)
+            page = connection.execute(
+                "SELECT * FROM user_data LIMIT ? OFFSET ?", (size, offset)
+            ).fetchall()
+            connection.close()
+            if not page:
+                break
+            yield page
+            offset += size
+
+    def keyset_pages(size):
+        connection = sqlite3.connect(path)
+        page = connection.execute(
+            "SELECT * FROM user_data ORDER BY user_id LIMIT ?", (size,)
+        ).fetchall()
+        while page:
+            yield page
+            page = connection.execute(
+                "SELECT * FROM user_data WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                (page[-1][0], size)
+            ).fetchall()
+        connection.close()
+
+    def ages(size):
+        for batch in fetchmany_batches(size):
+            for row in batch:
+                yield float(row[3])
+
+    strategies = [('stream_users_fetchone', None, fetchone_rows)]
+    for size in sizes:
+        strategies += [
+            ('stream_users_in_batches', size, lambda s=size: fetchmany_batches(s)),
+            ('lazy_pagination', size, lambda s=size: offset_pages(s)),
+            ('lazy_keyset_pagination', size, lambda s=size: keyset_pages(s)),
+            ('stream_user_ages', size, lambda s=size: ages(s)),
+        ]
+    return strategies
+
+
+def _drain(factory):
+    """
+    Drains one iterator from factory.
+
+    Returns:
+        tuple: (rows, seconds to the first item or None)
+    """
+    start = time.perf_counter()
+    first_row = None
+    rows = 0
+    for item in factory():
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        rows += len(item) if isinstance(item, list) else 1
+    return rows, first_row
+
+
+def measure(name, size, factory):
+    """
+    Runs one strategy to completion twice and records its metrics.
+
+    The timed run is not traced; peak Python memory comes from a second
+    run under tracemalloc, which would otherwise slow the loop several
+    times over and skew throughput and first-row latency.
+
+    Args:
+        name (str): Strategy name
+        size (int): Batch/page size used, or None
+        factory (callable): Returns the iterator to drain
+
+    Returns:
+        dict: rows, seconds, rows_per_sec, first_row_ms and peak_python_kb
+    """
+    start = time.perf_counter()
+    rows, first_row = _drain(factory)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        _drain(factory)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'strategy': name,
+        'size': size,
+        'rows': rows,
+        'seconds': round(elapsed, 4),
+        'rows_per_sec': round(rows / elapsed) if elapsed > 0 else None,
+        'first_row_ms': round(first_row * 1000, 3) if first_row is not None else None,
+        'peak_python_kb': peak // 1024,
+    }
+
+
+def mysql_available():
+    """
+    Returns:
+        bool: True if the MySQL driver is installed and the server answers
+    """
+    try:
+        import seed
+    except ImportError:
+        return False
+    connection = seed.connect_db()
+    if connection is None:
+        return False
+    connection.close()
+    return True
+
+
+def main():
+    """
+    Parses arguments, seeds the table, runs every strategy and emits the report.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000,
+                        help='number of synthetic users to seed')
+    parser.add_argument('--sizes', default='100,1000,5000',
+                        help='comma-separated batch/page sizes')
+    parser.add_argument('--backend', choices=('auto', 'mysql', 'sqlite'), default='auto')
+    parser.add_argument('--sqlite-path', default='benchmark_users.db')
+    parser.add_argument('--seed', action='store_true',
+                        help='drop and reseed user_data with --rows synthetic users '
+                             '(always done for a new SQLite file)')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    backend = args.backend
+    if backend == 'auto':
+        backend = 'mysql' if mysql_available() else 'sqlite'
+
+    if backend == 'mysql':
+        if args.seed:
+            seed_mysql(args.rows)
+        strategies = mysql_strategies(sizes)
+    else:
+        if args.seed or not os.path.exists(args.sqlite_path):
+            seed_sqlite(args.sqlite_path, args.rows)
+        strategies = sqlite_strategies(args.sqlite_path, sizes)
+
+    report = {
+        'backend': backend,
+        'rows': args.rows,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [measure(*strategy) for strategy in strategies],
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
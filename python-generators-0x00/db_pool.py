@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Shared MySQL connection pool for the ALX_prodev generator modules.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+
+def get_config(database='ALX_prodev'):
+    """
+    Builds MySQL connection settings from the environment.
+
+    Reads MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD and
+    MYSQL_DATABASE, falling back to the local root defaults.
+    MYSQL_DATABASE replaces the default database, but never turns a
+    server-level connection (database=None) into a database one.
+
+    Args:
+        database (str, optional): Default database, or None for the server
+
+    Returns:
+        dict: Keyword arguments for mysql.connector.connect
+    """
+    config = {
+        'host': os.environ.get('MYSQL_HOST', 'localhost'),
+        'port': int(os.environ.get('MYSQL_PORT', 3306)),
+        'user': os.environ.get('MYSQL_USER', 'root'),
+        'password': os.environ.get('MYSQL_PASSWORD', ''),
+    }
+    if database is not None:
+        database = os.environ.get('MYSQL_DATABASE', database)
+    if database:
+        config['database'] = database
+    return config
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of MySQL connections.
+
+    Keeps up to `size` idle connections for reuse and allows `max_overflow`
+    extra connections under load, which are closed when returned. Idle
+    connections older than `idle_timeout` seconds are discarded and every
+    checkout is health-checked before it is handed out.
+    """
+
+    def __init__(self, size=5, max_overflow=5, idle_timeout=300, timeout=30,
+                 **connect_kwargs):
+        """
+        Initialize the pool. Connections are opened lazily.
+
+        Args:
+            size (int): Number of idle connections kept for reuse
+            max_overflow (int): Extra connections allowed beyond size
+            idle_timeout (float): Seconds an idle connection may be reused
+            timeout (float): Seconds to wait for a free connection
+            **connect_kwargs: Arguments for mysql.connector.connect
+        """
+        self.size = size
+        self.max_overflow = max_overflow
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs or get_config()
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size + max_overflow)
+        self._checkouts = 0
+        self._in_use = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_time = 0.0
+
+    def _is_healthy(self, connection):
+        """
+        Checks that a connection is still usable, reconnecting is not attempted.
+        """
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        """
+        Closes a connection that will not go back into the pool.
+        """
+        with self._lock:
+            self._discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Checks a connection out of the pool.
+
+        Returns:
+            connection: MySQL connection object
+
+        Raises:
+            PoolError: If no connection is free within timeout seconds
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError("Timed out waiting for a pooled connection")
+        waited = time.perf_counter() - start
+
+        try:
+            connection = None
+            while connection is None:
+                with self._lock:
+                    entry = self._idle.popleft() if self._idle else None
+                if entry is None:
+                    connection = mysql.connector.connect(**self.connect_kwargs)
+                    with self._lock:
+                        self._created += 1
+                    break
+                candidate, last_used = entry
+                if (time.monotonic() - last_used > self.idle_timeout
+                        or not self._is_healthy(candidate)):
+                    self._discard(candidate)
+                    continue
+                connection = candidate
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._wait_time += waited
+        return connection
+
+    def release(self, connection):
+        """
+        Returns a connection to the pool.
+
+        Connections with an unread result set, or beyond the idle size,
+        are closed rather than reused; open transactions are rolled back.
+
+        Args:
+            connection: Connection previously returned by acquire()
+        """
+        try:
+            reusable = connection.is_connected() and not connection.unread_result
+            if reusable and connection.in_transaction:
+                connection.rollback()
+        except Exception:
+            reusable = False
+
+        with self._lock:
+            self._in_use -= 1
+            if reusable and len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                connection = None
+        if connection is not None:
+            self._discard(connection)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager that borrows a connection and always returns it.
+
+        Yields:
+            connection: MySQL connection object
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def stats(self):
+        """
+        Returns pool metrics.
+
+        Returns:
+            dict: checkouts, in_use, idle, created, discarded,
+                total and average wait time in seconds
+        """
+        with self._lock:
+            return {
+                'checkouts': self._checkouts,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'created': self._created,
+                'discarded': self._discarded,
+                'wait_time': self._wait_time,
+                'avg_wait_time': self._wait_time / self._checkouts if self._checkouts else 0.0,
+            }
+
+    def close_all(self):
+        """
+        Closes every idle connection in the pool.
+        """
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for connection, _ in idle:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+def close_cursor(cursor):
+    """
+    Closes a cursor without raising.
+
+    A stream stopped early leaves the rest of an unbuffered result unread,
+    and closing its cursor then raises InternalError. The error is ignored
+    here; release() sees the unread result and discards the connection
+    instead of reading the remaining rows.
+
+    Args:
+        cursor: MySQL cursor object
+    """
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the shared pool, creating it on first use.
+
+    Pool sizing is read from MYSQL_POOL_SIZE, MYSQL_POOL_OVERFLOW,
+    MYSQL_POOL_IDLE_TIMEOUT and MYSQL_POOL_TIMEOUT.
+
+    Returns:
+        ConnectionPool: The process-wide pool for ALX_prodev
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                size=int(os.environ.get('MYSQL_POOL_SIZE', 5)),
+                max_overflow=int(os.environ.get('MYSQL_POOL_OVERFLOW', 5)),
+                idle_timeout=float(os.environ.get('MYSQL_POOL_IDLE_TIMEOUT', 300)),
+                timeout=float(os.environ.get('MYSQL_POOL_TIMEOUT', 30)),
+                **get_config()
+            )
+        return _pool
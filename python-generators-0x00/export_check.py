@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for the columnar export: both formats load back the
+table's rows, and a failed export leaves no manifest behind.
+
+Runs against mysql_fake, an SQLite-backed stand-in for mysql.connector,
+in a temporary directory.
+
+Usage:
+    python3 export_check.py
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+import mysql_fake
+
+
+def table_rows(path):
+    """
+    Returns every (user_id, name, email, age) row in read order.
+    """
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("SELECT user_id, name, email, age FROM user_data").fetchall()
+    finally:
+        db.close()
+
+
+def loaded_rows(export_users, export_dir):
+    """
+    Returns the exported rows as (user_id, name, email, age) tuples.
+    """
+    rows = []
+    for chunk in export_users.load_chunks(export_dir):
+        for user_id, name, email, age in zip(chunk['user_id'], chunk['name'],
+                                             chunk['email'], chunk['age']):
+            rows.append((user_id.decode(), name.decode(), email.decode(), float(age)))
+    return rows
+
+
+def check_round_trip(export_users):
+    """
+    Compressed and memory-mapped exports both load back every row.
+    """
+    expected = [(user_id, name, email, float(age))
+                for user_id, name, email, age in table_rows('users.sqlite')]
+    for compress in (True, False):
+        export_dir = f"export-{compress}"
+        manifest = export_users.export_users(export_dir, chunk_size=30, compress=compress)
+        assert manifest['rows'] == 100 and len(manifest['chunks']) == 4, manifest
+        assert export_users.load_manifest(export_dir) == manifest
+        assert loaded_rows(export_users, export_dir) == expected
+    print("export: 100 rows in 4 chunks loaded back from .npz and .npy")
+
+
+def check_failed_export(export_users, server, mysql_errors):
+    """
+    An export that fails removes the previous manifest and writes none.
+    """
+    export_dir = "export-True"
+    server.fail_queries = 1
+    try:
+        export_users.export_users(export_dir, chunk_size=30)
+        raise AssertionError("failed export returned a manifest")
+    except mysql_errors.Error:
+        pass
+    assert not os.path.exists(os.path.join(export_dir, export_users.MANIFEST))
+    print("export: failed export left no manifest")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        mysql_fake.create_users('users.sqlite')
+        server = mysql_fake.install('users.sqlite')
+        import export_users
+        from mysql.connector import errors
+
+        check_round_trip(export_users)
+        check_failed_export(export_users, server, errors)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
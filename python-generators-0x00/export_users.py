@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Export user_data to chunked NumPy column files and read them back.
+
+Usage:
+    python3 export_users.py export_dir [--chunk-size 100000] [--no-compress]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+batch_processing = __import__('1-batch_processing')
+
+
+MANIFEST = 'manifest.json'
+
+
+def _chunk_name(index):
+    """
+    Returns the file name stem of chunk number index.
+    """
+    return f"chunk-{index:05d}"
+
+
+def export_users(output_dir, chunk_size=100000, compress=True):
+    """
+    Streams user_data through read_user_batches in columnar mode and
+    writes one file set per batch plus a manifest.
+
+    The manifest is written only after every row was read; a database
+    error raises and leaves the directory without one.
+
+    Compressed exports store each chunk as a .npz archive. Uncompressed
+    exports store one .npy file per column, which load_chunks can
+    memory-map. Memory use is bounded by one chunk.
+
+    Args:
+        output_dir (str): Directory to write into (created if missing)
+        chunk_size (int): Rows per chunk (default: 100000)
+        compress (bool): Write compressed .npz chunks (default: True)
+
+    Returns:
+        dict: The manifest that was written
+
+    Raises:
+        mysql.connector.Error: If reading user_data fails partway through
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # A manifest from an earlier export must not describe the new chunks
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    manifest = {
+        'columns': list(batch_processing.COLUMNS),
+        'compressed': compress,
+        'rows': 0,
+        'chunks': [],
+    }
+
+    for index, batch in enumerate(
+            batch_processing.read_user_batches(chunk_size, columnar=True)):
+        name = _chunk_name(index)
+        rows = len(batch['user_id'])
+        if compress:
+            np.savez_compressed(os.path.join(output_dir, f"{name}.npz"), **batch)
+        else:
+            for column, values in batch.items():
+                np.save(os.path.join(output_dir, f"{name}.{column}.npy"), values)
+        manifest['chunks'].append({
+            'name': name,
+            'rows': rows,
+            'dtypes': {column: values.dtype.str for column, values in batch.items()},
+        })
+        manifest['rows'] += rows
+
+    # Manifest last, so a partial export is never mistaken for a complete one
+    with open(manifest_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def load_manifest(export_dir):
+    """
+    Args:
+        export_dir (str): Directory written by export_users
+
+    Returns:
+        dict: The export manifest
+    """
+    with open(os.path.join(export_dir, MANIFEST), 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def load_chunks(export_dir, columns=None):
+    """
+    Generator that yields the exported chunks as dicts of column arrays.
+
+    Uncompressed exports are memory-mapped read-only, so only the pages
+    actually touched are read from disk; compressed chunks are inflated
+    one at a time.
+
+    Args:
+        export_dir (str): Directory written by export_users
+        columns (iterable, optional): Subset of columns to load
+
+    Yields:
+        dict: Column name -> NumPy array for one chunk
+    """
+    manifest = load_manifest(export_dir)
+    columns = list(columns or manifest['columns'])
+    for chunk in manifest['chunks']:
+        name = chunk['name']
+        if manifest['compressed']:
+            with np.load(os.path.join(export_dir, f"{name}.npz")) as archive:
+                yield {column: archive[column] for column in columns}
+        else:
+            yield {
+                column: np.load(os.path.join(export_dir, f"{name}.{column}.npy"),
+                                mmap_mode='r')
+                for column in columns
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export user_data to NumPy chunks")
+    parser.add_argument('output_dir')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--no-compress', action='store_true',
+                        help='write memory-mappable .npy files instead of .npz')
+    args = parser.parse_args()
+    result = export_users(args.output_dir, args.chunk_size, not args.no_compress)
+    print(f"Exported {result['rows']} rows in {len(result['chunks'])} chunks "
+          f"to {args.output_dir}")
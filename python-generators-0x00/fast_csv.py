@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped reader and validator for user_data.csv-shaped exports.
+"""
+
+import csv
+import mmap
+import os
+import re
+
+
+COLUMNS = ('user_id', 'name', 'email', 'age')
+
+UUID_PATTERN = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+)
+EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+AGE_PATTERN = re.compile(r'\d{1,8}(\.\d{1,2})?')
+
+
+def _parse_line(line):
+    """
+    Splits one raw CSV line into a tuple of stripped fields.
+
+    Lines without quotes are split directly; quoted lines go through the
+    csv module so embedded commas and newlines are handled.
+
+    Args:
+        line (bytes): Raw record including its final newline; may span
+            several physical lines when a quoted field contains newlines
+
+    Returns:
+        tuple: Decoded, stripped fields
+    """
+    text = line.decode('utf-8').rstrip('\r\n')
+    if '"' in text:
+        fields = next(csv.reader([text]), [])
+    else:
+        fields = text.split(',')
+    return tuple(field.strip() for field in fields)
+
+
+def column_order(header):
+    """
+    Checks a header row against COLUMNS.
+
+    Args:
+        header (tuple): Parsed header fields
+
+    Returns:
+        tuple: Index in each row of every column in COLUMNS order, or None
+            if the columns are already in that order
+
+    Raises:
+        ValueError: If the header does not name exactly the COLUMNS
+    """
+    header = tuple(name.lstrip('\ufeff') for name in header)
+    if header == COLUMNS:
+        return None
+    if sorted(header) != sorted(COLUMNS):
+        raise ValueError(
+            f"CSV header {', '.join(header)} does not match {', '.join(COLUMNS)}"
+        )
+    return tuple(header.index(column) for column in COLUMNS)
+
+
+def _records(data):
+    """
+    Generator that yields raw CSV records from a memory map.
+
+    A line with an unbalanced quote starts a quoted field that contains
+    a newline, so following lines are joined until the quotes balance.
+
+    Args:
+        data (mmap.mmap): Mapped file positioned after the header
+
+    Yields:
+        tuple: (number of the record's first line, raw record bytes)
+    """
+    line_number = 1
+    for line in iter(data.readline, b''):
+        line_number += 1
+        first_line = line_number
+        while line.count(b'"') % 2:
+            more = data.readline()
+            if not more:
+                break
+            line_number += 1
+            line += more
+        yield first_line, line
+
+
+def validate_batch(rows):
+    """
+    Splits a batch of parsed rows into valid and rejected rows.
+
+    Args:
+        rows (list): (line_number, fields) tuples
+
+    Returns:
+        tuple: (valid, rejected) where valid is a list of
+            (user_id, name, email, age) tuples and rejected a list of
+            (line_number, reason, fields) tuples
+    """
+    valid = []
+    rejected = []
+    uuid_match = UUID_PATTERN.fullmatch
+    email_match = EMAIL_PATTERN.fullmatch
+    age_match = AGE_PATTERN.fullmatch
+    for line_number, fields in rows:
+        if len(fields) != len(COLUMNS):
+            rejected.append((line_number, 'column count', fields))
+            continue
+        user_id, name, email, age = fields
+        if not uuid_match(user_id):
+            rejected.append((line_number, 'user_id', fields))
+        elif not name:
+            rejected.append((line_number, 'name', fields))
+        elif not email_match(email):
+            rejected.append((line_number, 'email', fields))
+        elif not age_match(age):
+            rejected.append((line_number, 'age', fields))
+        else:
+            valid.append(fields)
+    return valid, rejected
+
+
+def read_batches(csv_file, batch_size=10000, rejects_file=None, validate=True,
+                 stats=None):
+    """
+    Generator that memory-maps csv_file and yields rows as tuples in batches.
+
+    Columns are taken by name from the header row, which must name
+    exactly the COLUMNS (in any order). With validate, malformed rows are
+    left out of the batches and, if rejects_file is given, written to it
+    as CSV with their line number and the failing field. Quoted fields
+    may contain commas and newlines.
+
+    Args:
+        csv_file: Path to a CSV file with user_id,name,email,age columns
+        batch_size (int): Number of rows per batch (default: 10000)
+        rejects_file (str, optional): Path of the side file for rejected rows
+        validate (bool): Check UUID, email and age formats (default: True)
+        stats (dict, optional): Filled with 'rows' and 'rejected' counts
+
+    Yields:
+        list: List of (user_id, name, email, age) tuples
+
+    Raises:
+        ValueError: If the header does not match COLUMNS
+    """
+    if stats is None:
+        stats = {}
+    stats.update(rows=0, rejected=0)
+    if os.path.getsize(csv_file) == 0:
+        return
+
+    rejects = None
+    writer = None
+    try:
+        with open(csv_file, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            order = column_order(_parse_line(data.readline()))
+            if validate and rejects_file:
+                rejects = open(rejects_file, 'w', encoding='utf-8', newline='')
+                writer = csv.writer(rejects)
+                writer.writerow(('line', 'reason') + COLUMNS)
+            batch = []
+            for line_number, line in _records(data):
+                if not line.strip():
+                    continue
+                fields = _parse_line(line)
+                if order is not None and len(fields) == len(COLUMNS):
+                    fields = tuple(fields[index] for index in order)
+                batch.append((line_number, fields))
+                if len(batch) >= batch_size:
+                    yield _finish_batch(batch, validate, writer, stats)
+                    batch = []
+            if batch:
+                yield _finish_batch(batch, validate, writer, stats)
+    finally:
+        if rejects:
+            rejects.close()
+
+
+def _finish_batch(batch, validate, writer, stats):
+    """
+    Validates a parsed batch and records its rejected rows.
+
+    Args:
+        batch (list): (line_number, fields) tuples
+        validate (bool): Whether to validate the rows
+        writer: csv writer for rejected rows, or None
+        stats (dict): Running 'rows' and 'rejected' counts
+
+    Returns:
+        list: Accepted (user_id, name, email, age) tuples
+    """
+    stats['rows'] += len(batch)
+    if not validate:
+        return [fields for _, fields in batch]
+    valid, rejected = validate_batch(batch)
+    stats['rejected'] += len(rejected)
+    if writer:
+        for line_number, reason, fields in rejected:
+            writer.writerow((line_number, reason) + tuple(fields))
+    return valid
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+In-process stand-in for mysql.connector backed by SQLite, used by the
+*_check.py scripts to run the streaming modules without a MySQL server.
+
+Only what the modules use is provided: connect(), connections with
+cursor/commit/rollback/ping, plain and dictionary cursors that behave
+like unbuffered MySQL cursors on close, and the error classes. The few
+MySQL-only SQL constructs the modules send are translated.
+"""
+
+import re
+import sqlite3
+import sys
+import threading
+import types
+from datetime import datetime, timedelta
+
+
+class Error(Exception):
+    """
+    Base class of the fake's errors, like mysql.connector.Error.
+    """
+
+
+class InterfaceError(Error):
+    """
+    Raised when the server cannot be reached.
+    """
+
+
+class DatabaseError(Error):
+    """
+    Raised for errors reported by the database.
+    """
+
+
+class OperationalError(DatabaseError):
+    """
+    Raised when the connection is lost.
+    """
+
+
+class InternalError(DatabaseError):
+    """
+    Raised when a cursor is closed with an unread result.
+    """
+
+
+class ProgrammingError(DatabaseError):
+    """
+    Raised for invalid SQL.
+    """
+
+
+class IntegrityError(DatabaseError):
+    """
+    Raised for constraint violations.
+    """
+
+
+class PoolError(Error):
+    """
+    Raised by connection pools.
+    """
+
+
+_TRANSLATIONS = (
+    (re.compile(r'NOW\(6\)\s*-\s*INTERVAL\s+%s\s+MICROSECOND', re.IGNORECASE),
+     'now_minus_microseconds(%s)'),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.IGNORECASE), 'INSERT OR IGNORE'),
+)
+
+
+def _timestamp(value):
+    """
+    Converts a stored TIMESTAMP into a datetime, as MySQL returns it.
+    """
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('TIMESTAMP', _timestamp)
+
+
+class Server:
+    """
+    The database every fake connection opens, with knobs for failures.
+
+    Attributes:
+        down (bool): connect() and ping() fail while set
+        connects (int): Number of connections opened
+        open (int): Connections currently open
+        fail_queries (int): Number of upcoming execute() calls that fail
+            with OperationalError, as if the connection dropped
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.down = False
+        self.connects = 0
+        self.open = 0
+        self.fail_queries = 0
+        self._lock = threading.Lock()
+
+    def take_failure(self):
+        """
+        Returns True if the next query should fail.
+        """
+        with self._lock:
+            if self.fail_queries > 0:
+                self.fail_queries -= 1
+                return True
+            return False
+
+
+class Cursor:
+    """
+    A cursor over one statement's result; unbuffered unless buffered=True.
+    """
+
+    def __init__(self, connection, dictionary=False, buffered=False):
+        self._connection = connection
+        self._dictionary = dictionary
+        self._buffered = buffered
+        self._cursor = None
+        self._pending = False
+        self.rowcount = -1
+        self.description = None
+
+    def execute(self, query, params=()):
+        server = self._connection.server
+        if self._connection.closed or server.down or server.take_failure():
+            self._connection.closed = True
+            raise OperationalError("Lost connection to MySQL server during query")
+        for pattern, replacement in _TRANSLATIONS:
+            query = pattern.sub(replacement, query)
+        try:
+            self._cursor = self._connection.db.execute(
+                query.replace('%s', '?'), tuple(params or ())
+            )
+        except sqlite3.IntegrityError as e:
+            raise IntegrityError(str(e)) from e
+        except sqlite3.Error as e:
+            raise ProgrammingError(str(e)) from e
+        self.description = self._cursor.description
+        self.rowcount = self._cursor.rowcount
+        self._pending = self.description is not None
+
+    def executemany(self, query, rows):
+        rows = list(rows)
+        for pattern, replacement in _TRANSLATIONS:
+            query = pattern.sub(replacement, query)
+        if self._connection.closed or self._connection.server.take_failure():
+            self._connection.closed = True
+            raise OperationalError("Lost connection to MySQL server during query")
+        try:
+            cursor = self._connection.db.executemany(query.replace('%s', '?'), rows)
+        except sqlite3.Error as e:
+            raise DatabaseError(str(e)) from e
+        self.rowcount = cursor.rowcount
+
+    def _shape(self, rows):
+        if not self._dictionary:
+            return rows
+        names = [column[0] for column in self.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchmany(self, size=1):
+        rows = self._cursor.fetchmany(size)
+        if len(rows) < size:
+            self._pending = False
+        return self._shape(rows)
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._pending = False
+        return self._shape(rows)
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        if self._pending and not self._buffered:
+            self._connection.unread_result = True
+            raise InternalError("Unread result found")
+
+
+class Connection:
+    """
+    One connection to the fake server.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.db = sqlite3.connect(server.path, check_same_thread=False,
+                                  detect_types=sqlite3.PARSE_DECLTYPES)
+        self.db.create_function(
+            'now_minus_microseconds', 1,
+            lambda microseconds: (datetime.now()
+                                  - timedelta(microseconds=microseconds)).isoformat(' ')
+        )
+        self.closed = False
+        self.unread_result = False
+
+    @property
+    def in_transaction(self):
+        return self.db.in_transaction
+
+    def cursor(self, dictionary=False, buffered=False, **kwargs):
+        return Cursor(self, dictionary, buffered)
+
+    def ping(self, reconnect=False):
+        if self.closed or self.server.down:
+            raise InterfaceError("MySQL server has gone away")
+
+    def is_connected(self):
+        return not self.closed and not self.server.down
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+            self.closed = True
+            with self.server._lock:
+                self.server.open -= 1
+
+
+def create_users(path, rows=100):
+    """
+    Creates a user_data table like seed.create_table with numbered users
+    whose user_ids are spread over the UUID key space.
+
+    Args:
+        path (str): Path of the SQLite file
+        rows (int): Number of users; user n is n years old
+    """
+    db = sqlite3.connect(path)
+    db.execute("""
+        CREATE TABLE user_data (
+            user_id VARCHAR(36) NOT NULL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age DECIMAL(10, 2) NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    stamp = datetime(2024, 1, 1)
+    db.executemany(
+        "INSERT INTO user_data VALUES (?, ?, ?, ?, ?)",
+        [(f"{n * 2654435761 % 2 ** 32:08x}-0000-4000-8000-{n:012d}", f"User {n}", f"user{n}@example.com",
+          n, (stamp + timedelta(seconds=n)).isoformat(' '))
+         for n in range(1, rows + 1)]
+    )
+    db.commit()
+    db.close()
+
+
+def install(path):
+    """
+    Registers the fake as mysql.connector, backed by the SQLite file at path.
+
+    Must run before the modules that import mysql.connector.
+
+    Args:
+        path (str): Path of the SQLite file every connection opens
+
+    Returns:
+        Server: Failure knobs and connection counters
+    """
+    server = Server(path)
+
+    def connect(**kwargs):
+        if server.down:
+            raise InterfaceError("Can't connect to MySQL server")
+        with server._lock:
+            server.connects += 1
+            server.open += 1
+        return Connection(server)
+
+    mysql = types.ModuleType('mysql')
+    connector = types.ModuleType('mysql.connector')
+    errors = types.ModuleType('mysql.connector.errors')
+    for cls in (Error, InterfaceError, DatabaseError, OperationalError,
+                InternalError, ProgrammingError, IntegrityError, PoolError):
+        setattr(connector, cls.__name__, cls)
+        setattr(errors, cls.__name__, cls)
+    connector.connect = connect
+    connector.errors = errors
+    mysql.connector = connector
+    sys.modules.update({
+        'mysql': mysql,
+        'mysql.connector': connector,
+        'mysql.connector.errors': errors,
+    })
+    return server
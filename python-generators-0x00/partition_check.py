@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for the partitioned table scan: every row is read once
+in both modes, and a failing range raises in the consumer instead of
+ending the stream with rows missing.
+
+Runs against mysql_fake, an SQLite-backed stand-in for mysql.connector,
+in a temporary directory.
+
+Usage:
+    python3 partition_check.py
+"""
+
+import os
+import sys
+import tempfile
+
+import mysql_fake
+
+
+def check_complete(stream_users):
+    """
+    Both modes yield every row exactly once; ordered mode in user_id order.
+    """
+    expected = sorted(row['user_id'] for row in stream_users.stream_users())
+    assert len(expected) == 100
+
+    unordered = [row['user_id'] for row in
+                 stream_users.stream_users_partitioned(partitions=4, chunk_size=7)]
+    assert sorted(unordered) == expected
+    ordered = [row['user_id'] for row in
+               stream_users.stream_users_partitioned(partitions=4, ordered=True, chunk_size=7)]
+    assert ordered == expected
+
+    total = stream_users.map_partitions(
+        lambda rows: sum(1 for _ in rows), sum, partitions=4, chunk_size=7
+    )
+    assert total == 100
+    print("partitions: 4 ranges read all 100 rows once, in order when asked")
+
+
+def check_failed_range(stream_users, server, mysql_errors, db_pool):
+    """
+    A range whose query fails raises in the consumer, in both modes.
+    """
+    for ordered in (False, True):
+        server.fail_queries = 1
+        rows = []
+        try:
+            for row in stream_users.stream_users_partitioned(partitions=4, ordered=ordered):
+                rows.append(row)
+            raise AssertionError(f"stream ended with {len(rows)} of 100 rows")
+        except mysql_errors.OperationalError:
+            pass
+    assert db_pool.get_pool().stats()['in_use'] == 0, "a reader kept its connection"
+    print("partitions: failing range raised in the consumer in both modes")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        mysql_fake.create_users('users.sqlite')
+        server = mysql_fake.install('users.sqlite')
+        import db_pool
+        stream_users = __import__('0-stream_users')
+        from mysql.connector import errors
+
+        check_complete(stream_users)
+        check_failed_range(stream_users, server, errors, db_pool)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for the shared MySQL connection pool: connection
+settings, pool exhaustion, and connections left behind by streams
+stopped early or by a server restart.
+
+Runs against mysql_fake, an SQLite-backed stand-in for mysql.connector,
+in a temporary directory.
+
+Usage:
+    python3 pool_check.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+import mysql_fake
+
+
+def check_config(db_pool):
+    """
+    MYSQL_DATABASE replaces the default database but not a server connection.
+    """
+    os.environ['MYSQL_DATABASE'] = 'other'
+    try:
+        assert db_pool.get_config()['database'] == 'other'
+        assert 'database' not in db_pool.get_config(database=None)
+    finally:
+        del os.environ['MYSQL_DATABASE']
+    assert db_pool.get_config()['database'] == 'ALX_prodev'
+    print("config: MYSQL_DATABASE kept server connections database-less")
+
+
+def check_exhaustion(db_pool, mysql_errors):
+    """
+    size + max_overflow connections can be borrowed at once; the next
+    borrower times out, and a release lets it through.
+    """
+    pool = db_pool.ConnectionPool(size=2, max_overflow=1, timeout=0.2, database='x')
+    held = [pool.acquire() for _ in range(3)]
+    try:
+        pool.acquire()
+        raise AssertionError("exhausted pool handed out a connection")
+    except mysql_errors.PoolError:
+        pass
+
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    pool.timeout = 5
+    waiter.start()
+    pool.release(held.pop())
+    waiter.join()
+    assert len(got) == 1
+    for connection in held + got:
+        pool.release(connection)
+
+    stats = pool.stats()
+    assert stats['in_use'] == 0 and stats['idle'] == 2, stats
+    assert stats['discarded'] == 1, "overflow connection was kept"
+    pool.close_all()
+    print("pool: 3 of 3 slots borrowed, 4th timed out, then got a released slot")
+
+
+def check_abandoned_stream(db_pool, stream_users, server):
+    """
+    A stream stopped early returns its slot, and its connection with an
+    unread result is not reused.
+    """
+    pool = db_pool.get_pool()
+    before = pool.stats()
+    for _ in range(pool.size + pool.max_overflow + 1):
+        users = stream_users.stream_users(chunk_size=10)
+        next(users)
+        users.close()
+
+    stats = pool.stats()
+    assert stats['in_use'] == 0, stats
+    assert stats['discarded'] - before['discarded'] == pool.size + pool.max_overflow + 1
+    assert server.open == stats['idle'], "connections leaked"
+    print("pool: streams stopped early returned their slots and dropped their connections")
+
+
+def check_server_restart(db_pool, stream_users, server):
+    """
+    Idle connections that died with the server are replaced on checkout.
+    """
+    pool = db_pool.get_pool()
+    with pool.connection():
+        pass
+    connects = server.connects
+    for connection, _ in list(pool._idle):
+        connection.closed = True
+
+    assert len(list(stream_users.stream_users())) == 100
+    assert server.connects == connects + 1
+    print("pool: dead idle connection replaced on checkout")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        mysql_fake.create_users('users.sqlite')
+        server = mysql_fake.install('users.sqlite')
+        os.environ.update({'MYSQL_POOL_SIZE': '2', 'MYSQL_POOL_OVERFLOW': '1'})
+        import db_pool
+        stream_users = __import__('0-stream_users')
+        from mysql.connector import errors
+
+        check_config(db_pool)
+        check_exhaustion(db_pool, errors)
+        check_abandoned_stream(db_pool, stream_users, server)
+        check_server_restart(db_pool, stream_users, server)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for read-ahead pagination: pages arrive unchanged and in
+order, fetching overlaps the consumer's work, a consumer that stops early
+releases the source's connection, and source errors reach the consumer.
+
+Runs against mysql_fake, an SQLite-backed stand-in for mysql.connector,
+in a temporary directory.
+
+Usage:
+    python3 prefetch_check.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import mysql_fake
+
+
+def check_pages(paginate):
+    """
+    Prefetched pages equal the pages read in the foreground.
+    """
+    plain = list(paginate.lazy_pagination(7))
+    assert sum(len(page) for page in plain) == 100
+    assert list(paginate.lazy_pagination_prefetched(7, depth=3)) == plain
+    keyset = list(paginate.lazy_keyset_pagination(7))
+    assert list(paginate.prefetch_pages(paginate.lazy_keyset_pagination(7))) == keyset
+    print("prefetch: prefetched pages matched the foreground pages")
+
+
+def check_overlap(paginate, delay=0.05, pages=5):
+    """
+    The next page is fetched while the consumer works on the current one.
+    """
+    def slow_pages():
+        for number in range(pages):
+            time.sleep(delay)
+            yield [number]
+
+    start = time.perf_counter()
+    for _ in paginate.prefetch_pages(slow_pages()):
+        time.sleep(delay)
+    elapsed = time.perf_counter() - start
+    # Serial work would take 2 * delay per page
+    assert elapsed < 1.6 * delay * pages, f"{elapsed:.3f}s, fetching did not overlap"
+    print(f"prefetch: {pages} pages in {elapsed:.2f}s instead of {2 * delay * pages:.2f}s")
+
+
+def check_early_stop(paginate, db_pool):
+    """
+    Stopping after one page closes the source and returns its connection.
+    """
+    pages = paginate.prefetch_pages(paginate.lazy_keyset_pagination(5), depth=2)
+    next(pages)
+    pages.close()
+    stats = db_pool.get_pool().stats()
+    assert stats['in_use'] == 0, stats
+    print("prefetch: consumer stopping early released the scan's connection")
+
+
+def check_error(paginate):
+    """
+    An error raised by the source is raised in the consumer, after the
+    pages read before it.
+    """
+    def failing_pages():
+        yield [1]
+        raise RuntimeError("page failed")
+
+    received = []
+    try:
+        for page in paginate.prefetch_pages(failing_pages()):
+            received.append(page)
+        raise AssertionError("source error was swallowed")
+    except RuntimeError:
+        pass
+    assert received == [[1]]
+    print("prefetch: source error raised in the consumer")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        mysql_fake.create_users('users.sqlite')
+        mysql_fake.install('users.sqlite')
+        import db_pool
+        paginate = __import__('2-lazy_paginate')
+
+        check_pages(paginate)
+        check_overlap(paginate)
+        check_early_stop(paginate, db_pool)
+        check_error(paginate)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
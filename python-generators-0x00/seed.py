@@ -5,8 +5,13 @@ Seed script to set up MySQL database and populate with user data.
 
 import mysql.connector
 from mysql.connector import Error
-import csv
 import os
+import queue
+import threading
+import time
+
+import db_pool
+import fast_csv
 
 
 def connect_db():
@@ -17,11 +22,7 @@ def connect_db():
         connection: MySQL connection object or None if connection fails
     """
     try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password=''
-        )
+        connection = mysql.connector.connect(**db_pool.get_config(database=None))
         if connection.is_connected():
             return connection
     except Error as e:
@@ -53,12 +54,7 @@ def connect_to_prodev():
         connection: MySQL connection object or None if connection fails
     """
     try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='',
-            database='ALX_prodev'
-        )
+        connection = mysql.connector.connect(**db_pool.get_config())
         if connection.is_connected():
             return connection
     except Error as e:
@@ -70,6 +66,10 @@ def create_table(connection):
     """
     Creates the user_data table if it does not exist with the required fields.
     
+    updated_at is maintained by MySQL on every insert and update and is
+    the high-water mark used by stream_changes. It is added to tables
+    created before the column existed.
+    
     Args:
         connection: MySQL connection object
     """
@@ -81,10 +81,27 @@ def create_table(connection):
             name VARCHAR(255) NOT NULL,
             email VARCHAR(255) NOT NULL,
             age DECIMAL(10, 2) NOT NULL,
-            INDEX idx_user_id (user_id)
+            updated_at TIMESTAMP(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+            INDEX idx_user_id (user_id),
+            INDEX idx_updated_at (updated_at, user_id)
         )
         """
         cursor.execute(create_table_query)
+        
+        # Add change tracking to a table created by an older version
+        cursor.execute(
+            "SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data' "
+            "AND COLUMN_NAME = 'updated_at'"
+        )
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("""
+            ALTER TABLE user_data
+                ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+                ADD INDEX idx_updated_at (updated_at, user_id)
+            """)
         connection.commit()
         cursor.close()
         print("Table user_data created successfully")
@@ -92,13 +109,45 @@ def create_table(connection):
         print(f"Error creating table: {e}")
 
 
-def insert_data(connection, csv_file):
+def read_csv_in_batches(csv_file, batch_size, rejects_file=None, stats=None):
+    """
+    Generator that reads the CSV file and yields valid rows in chunks of tuples.
+    
+    The file is memory-mapped and validated by fast_csv; rows with a bad
+    UUID, email or age are dropped and, if rejects_file is given, written
+    there with their line number. Columns are matched by header name, and
+    a header that does not name user_id, name, email and age raises
+    ValueError.
+    
+    Args:
+        csv_file: Path to the CSV file containing user data
+        batch_size (int): Number of rows per chunk
+        rejects_file (str, optional): Path of the side file for rejected rows
+        stats (dict, optional): Filled with 'rows' and 'rejected' counts
+    
+    Yields:
+        list: List of (user_id, name, email, age) tuples
+    """
+    for batch in fast_csv.read_batches(csv_file, batch_size, rejects_file, stats=stats):
+        if batch:
+            yield batch
+
+
+def insert_data(connection, csv_file, batch_size=1000, verbose=False,
+                rejects_file=None):
     """
     Inserts data from CSV file into the database if it does not exist.
     
+    Rows are sent in chunks as a single multi-row INSERT IGNORE statement,
+    so duplicates are skipped by the user_id primary key in the database
+    instead of with a SELECT per row.
+    
     Args:
         connection: MySQL connection object
         csv_file: Path to the CSV file containing user data
+        batch_size (int): Number of rows sent per statement (default: 1000)
+        verbose (bool): Print a progress line after every chunk
+        rejects_file (str, optional): Path of the side file for rejected rows
     """
     try:
         if not os.path.exists(csv_file):
@@ -106,38 +155,215 @@ def insert_data(connection, csv_file):
             return
         
         cursor = connection.cursor()
+        insert_query = """
+        INSERT IGNORE INTO user_data (user_id, name, email, age)
+        VALUES (%s, %s, %s, %s)
+        """
+        processed_count = 0
         inserted_count = 0
-        skipped_count = 0
+        read_stats = {}
+        start_time = time.perf_counter()
         
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
+        for batch in read_csv_in_batches(csv_file, batch_size, rejects_file, read_stats):
+            # mysql.connector rewrites executemany INSERTs into one statement
+            cursor.executemany(insert_query, batch)
+            connection.commit()
+            processed_count += len(batch)
+            inserted_count += max(cursor.rowcount, 0)
             
-            for row in csv_reader:
-                user_id = row['user_id'].strip()
-                name = row['name'].strip()
-                email = row['email'].strip()
-                age = row['age'].strip()
-                
-                # Check if record already exists
-                check_query = "SELECT COUNT(*) FROM user_data WHERE user_id = %s"
-                cursor.execute(check_query, (user_id,))
-                exists = cursor.fetchone()[0]
-                
-                if not exists:
-                    insert_query = """
-                    INSERT INTO user_data (user_id, name, email, age)
-                    VALUES (%s, %s, %s, %s)
-                    """
-                    cursor.execute(insert_query, (user_id, name, email, age))
-                    inserted_count += 1
-                else:
-                    skipped_count += 1
+            if verbose:
+                elapsed = time.perf_counter() - start_time
+                rate = processed_count / elapsed if elapsed > 0 else 0
+                print(f"Progress: {processed_count} rows processed ({rate:.0f} rows/sec)")
         
-        connection.commit()
         cursor.close()
-        print(f"Data insertion completed: {inserted_count} inserted, {skipped_count} skipped")
+        elapsed = time.perf_counter() - start_time
+        rate = processed_count / elapsed if elapsed > 0 else 0
+        print(f"Data insertion completed: {processed_count} rows processed, "
+              f"{inserted_count} inserted, {read_stats.get('rejected', 0)} rejected "
+              f"in {elapsed:.2f}s ({rate:.0f} rows/sec)")
     except Error as e:
         print(f"Error inserting data: {e}")
     except Exception as e:
         print(f"Error reading CSV file: {e}")
 
+
+def _connection_lost(connection):
+    """
+    Checks whether an insert failed because the connection is gone.
+    
+    Returns:
+        bool: True if the server no longer answers on this connection
+    """
+    try:
+        connection.ping(reconnect=False)
+        return False
+    except Error:
+        return True
+
+
+def _insert_worker(worker_id, batch_queue, stats):
+    """
+    Worker loop that takes batches off the queue and inserts them
+    on its own connection until it receives the None sentinel.
+    
+    A worker that cannot connect exits without taking any batch, so the
+    other workers insert them instead. A worker whose connection drops
+    puts its batch back on the queue for the others (INSERT IGNORE makes
+    a repeated batch harmless) and exits the same way; if the queue is
+    full, the batch is counted as not inserted. Rows of batches that fail
+    to insert for any other reason are counted as failed.
+    
+    Args:
+        worker_id (int): Index of the worker
+        batch_queue (queue.Queue): Queue of row batches
+        stats (dict): Shared dict the worker writes its summary into
+    """
+    connection = connect_to_prodev()
+    processed_count = 0
+    inserted_count = 0
+    failed_count = 0
+    not_inserted = 0
+    start_time = time.perf_counter()
+    insert_query = """
+    INSERT IGNORE INTO user_data (user_id, name, email, age)
+    VALUES (%s, %s, %s, %s)
+    """
+    try:
+        if connection is None:
+            print(f"Worker {worker_id} could not connect and is stopping")
+            return
+        cursor = connection.cursor()
+        while True:
+            batch = batch_queue.get()
+            try:
+                if batch is None:
+                    break
+                cursor.executemany(insert_query, batch)
+                connection.commit()
+                processed_count += len(batch)
+                inserted_count += max(cursor.rowcount, 0)
+            except Error as e:
+                if not _connection_lost(connection):
+                    failed_count += len(batch)
+                    print(f"Worker {worker_id} error inserting batch: {e}")
+                    continue
+                print(f"Worker {worker_id} lost its connection and is stopping: {e}")
+                try:
+                    batch_queue.put_nowait(batch)
+                except queue.Full:
+                    not_inserted += len(batch)
+                return
+            finally:
+                batch_queue.task_done()
+        cursor.close()
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+        stats[worker_id] = {
+            'connected': connection is not None,
+            'processed': processed_count,
+            'inserted': inserted_count,
+            'failed': failed_count,
+            'not_inserted': not_inserted,
+            'seconds': time.perf_counter() - start_time,
+        }
+
+
+def _put_batch(batch_queue, item, threads):
+    """
+    Puts an item on the queue, waiting while at least one worker is alive.
+    
+    Returns:
+        bool: False if every worker has exited, so nobody would take it
+    """
+    while any(thread.is_alive() for thread in threads):
+        try:
+            batch_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def insert_data_parallel(csv_file, workers=4, batch_size=1000, queue_size=8,
+                         rejects_file=None):
+    """
+    Inserts data from CSV file using a reader stage and several insert workers.
+    
+    The calling thread reads and validates rows and puts batches on a bounded
+    queue; each worker holds its own connection and commits its batches
+    independently. The bounded queue blocks the reader when workers fall behind.
+    Workers that cannot connect leave their share to the others; if none
+    can, reading stops. Rows that failed to insert or were never handed
+    to a worker are reported in the summary.
+    
+    Args:
+        csv_file: Path to the CSV file containing user data
+        workers (int): Number of insert workers/connections (default: 4)
+        batch_size (int): Number of rows per batch (default: 1000)
+        queue_size (int): Maximum number of batches waiting in the queue
+        rejects_file (str, optional): Path of the side file for rejected rows
+    
+    Returns:
+        dict: Per-worker summary keyed by worker id
+    """
+    if not os.path.exists(csv_file):
+        print(f"Error: CSV file '{csv_file}' not found")
+        return {}
+    
+    batch_queue = queue.Queue(maxsize=queue_size)
+    stats = {}
+    threads = [
+        threading.Thread(target=_insert_worker, args=(i, batch_queue, stats), daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    
+    read_stats = {}
+    not_inserted = 0
+    start_time = time.perf_counter()
+    try:
+        for batch in read_csv_in_batches(csv_file, batch_size, rejects_file, read_stats):
+            if not _put_batch(batch_queue, batch, threads):
+                not_inserted += len(batch)
+                print("Error: no insert worker is running, stopping the read")
+                break
+    except Exception as e:
+        print(f"Error reading CSV file: {e}")
+    finally:
+        # One sentinel per worker so every running thread exits
+        for _ in threads:
+            if not _put_batch(batch_queue, None, threads):
+                break
+        for thread in threads:
+            thread.join()
+    
+    # Batches left on the queue were never taken by a worker
+    while True:
+        try:
+            batch = batch_queue.get_nowait()
+        except queue.Empty:
+            break
+        if batch is not None:
+            not_inserted += len(batch)
+    
+    elapsed = time.perf_counter() - start_time
+    for worker_id in sorted(stats):
+        worker = stats[worker_id]
+        if not worker['connected']:
+            print(f"Worker {worker_id}: could not connect")
+            continue
+        rate = worker['processed'] / worker['seconds'] if worker['seconds'] > 0 else 0
+        print(f"Worker {worker_id}: {worker['processed']} rows processed, "
+              f"{worker['inserted']} inserted, {worker['failed']} failed ({rate:.0f} rows/sec)")
+    total = sum(worker['processed'] for worker in stats.values())
+    failed = sum(worker['failed'] for worker in stats.values())
+    not_inserted += sum(worker['not_inserted'] for worker in stats.values())
+    rate = total / elapsed if elapsed > 0 else 0
+    outcome = "completed" if not failed and not not_inserted else "finished with errors"
+    print(f"Parallel insertion {outcome}: {total} rows processed, "
+          f"{failed} failed, {not_inserted} not inserted (no worker), "
+          f"{read_stats.get('rejected', 0)} rejected in {elapsed:.2f}s ({rate:.0f} rows/sec)")
+    return stats
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Runnable checks for parallel seeding: a worker whose connection drops
+hands its batch to the others, and rows nobody could insert are counted
+as not inserted rather than failed or lost.
+
+Runs against mysql_fake, an SQLite-backed stand-in for mysql.connector,
+in a temporary directory.
+
+Usage:
+    python3 seed_check.py
+"""
+
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import uuid
+
+import mysql_fake
+
+
+ROWS = 500
+
+
+def write_csv(path, rows=ROWS):
+    """
+    Writes a user_data CSV with rows valid users.
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("user_id,name,email,age\n")
+        for n in range(rows):
+            file.write(f"{uuid.UUID(int=n * 7919 + 1, version=4)},User {n},"
+                       f"user{n}@example.com,{20 + n % 60}\n")
+
+
+def stored_rows(path):
+    """
+    Returns the number of rows in user_data.
+    """
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("SELECT COUNT(*) FROM user_data").fetchone()[0]
+    finally:
+        db.close()
+
+
+def seed(seed_module, workers=4):
+    """
+    Runs insert_data_parallel quietly and returns its summary.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return seed_module.insert_data_parallel('users.csv', workers=workers, batch_size=25)
+
+
+def check_dropped_connection(seed_module, server):
+    """
+    Batches of workers that lose their connection are inserted by the others.
+    """
+    mysql_fake.create_users('dropped.sqlite', rows=0)
+    server.path = 'dropped.sqlite'
+    server.fail_queries = 2
+    stats = seed(seed_module)
+
+    assert server.fail_queries == 0
+    assert stored_rows('dropped.sqlite') == ROWS, "rows of a dropped connection were lost"
+    assert sum(worker['failed'] for worker in stats.values()) == 0
+    assert sum(worker['processed'] for worker in stats.values()) == ROWS
+    print("seed: two dropped connections, their batches inserted by the other workers")
+
+
+def check_all_dropped(seed_module, server):
+    """
+    When every connection drops, each row is inserted or counted as not inserted.
+    """
+    mysql_fake.create_users('all.sqlite', rows=0)
+    server.path = 'all.sqlite'
+    server.fail_queries = 4
+    stats = seed(seed_module)
+
+    not_inserted = sum(worker['not_inserted'] for worker in stats.values())
+    processed = sum(worker['processed'] for worker in stats.values())
+    assert sum(worker['failed'] for worker in stats.values()) == 0
+    assert processed == stored_rows('all.sqlite')
+    assert processed < ROWS, "no worker lost its connection"
+    assert processed + not_inserted <= ROWS
+    print(f"seed: every connection dropped, {processed} inserted and none counted as failed")
+
+
+def main():
+    """
+    Runs every check in a temporary directory.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        write_csv('users.csv')
+        server = mysql_fake.install('unused.sqlite')
+        import seed as seed_module
+
+        check_dropped_connection(seed_module, server)
+        check_all_dropped(seed_module, server)
+        os.chdir(here)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
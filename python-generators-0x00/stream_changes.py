@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Incremental change stream for the user_data table.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from mysql.connector import Error
+
+import db_pool
+
+
+DEFAULT_CHECKPOINT = '.user_data_checkpoint.json'
+DEFAULT_LAG_SECONDS = 5
+
+
+def load_checkpoint(path=DEFAULT_CHECKPOINT):
+    """
+    Loads the high-water mark saved by the previous run.
+
+    Args:
+        path (str): Path of the checkpoint file
+
+    Returns:
+        tuple: (updated_at, user_id) of the last processed row, or None
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    return datetime.fromisoformat(data['updated_at']), data['user_id']
+
+
+def save_checkpoint(mark, path=DEFAULT_CHECKPOINT):
+    """
+    Atomically saves the high-water mark.
+
+    Args:
+        mark (tuple): (updated_at, user_id) of the last processed row
+        path (str): Path of the checkpoint file
+    """
+    updated_at, user_id = mark
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'updated_at': updated_at.isoformat(), 'user_id': user_id}, file)
+    os.replace(tmp_path, path)
+
+
+def stream_changes(checkpoint_path=DEFAULT_CHECKPOINT, chunk_size=1000,
+                   lag_seconds=DEFAULT_LAG_SECONDS):
+    """
+    Generator that yields only the rows inserted or modified since the last run.
+
+    Rows are read in (updated_at, user_id) order starting after the saved
+    high-water mark. A row counts as processed once the consumer asks for
+    the next one, and the mark of the last processed row is saved after
+    every chunk and when the generator is closed, so an interrupted run
+    resumes without skipping rows.
+
+    updated_at is set when a statement runs, not when its transaction
+    commits, so a slow transaction can commit rows older than a mark
+    already passed. Only rows older than lag_seconds (by the server
+    clock) are read; newer ones are left for the next run. Transactions
+    that stay open longer than the lag can still be missed.
+
+    Args:
+        checkpoint_path (str): Path of the local checkpoint file
+        chunk_size (int): Number of rows pulled per fetchmany call
+        lag_seconds (float): Safety lag behind the server's current time
+
+    Yields:
+        dict: Dictionary containing user_id, name, email, age and updated_at
+    """
+    mark = load_checkpoint(checkpoint_path)
+    saved_mark = mark
+    query = ("SELECT user_id, name, email, age, updated_at FROM user_data "
+             "WHERE updated_at < NOW(6) - INTERVAL %s MICROSECOND")
+    params = (int(lag_seconds * 1000000),)
+    if mark is not None:
+        query += " AND (updated_at > %s OR (updated_at = %s AND user_id > %s))"
+        params += (mark[0], mark[0], mark[1])
+    query += " ORDER BY updated_at, user_id"
+
+    pool = db_pool.get_pool()
+    connection = None
+    cursor = None
+    try:
+        connection = pool.acquire()
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params)
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+                # The consumer came back for more, so this row is done
+                mark = (row['updated_at'], row['user_id'])
+            save_checkpoint(mark, checkpoint_path)
+            saved_mark = mark
+
+    except Error as e:
+        print(f"Error streaming changes: {e}")
+    finally:
+        if mark is not None and mark != saved_mark:
+            save_checkpoint(mark, checkpoint_path)
+        try:
+            if cursor:
+                db_pool.close_cursor(cursor)
+        finally:
+            if connection:
+                pool.release(connection)